@@ -1,36 +1,85 @@
-from flask import Flask
+import importlib
+import tempfile
+from flask import Flask, Request
 from flask_cors import CORS
 from config import Config
 from models import db
 from flask_migrate import Migrate
-from routes.auth import auth_bp
-from routes.incidents import incidents_bp
-from routes.users import users_bp
-from routes.predict import predict_bp
-from routes.sos import sos_bp
-from routes.donations import donations_bp
-from routes.nlp import nlp_bp
-
-def create_app():
+from routes.health import health_bp
+from services.registry import registry
+from services.events import events
+
+# Blueprint name -> (module, attribute, URL prefix). Modules are imported only
+# when the blueprint is enabled, so CRUD-only workers never import the ML stack.
+BLUEPRINTS = {
+    "auth": ("routes.auth", "auth_bp", "/api/auth"),
+    "incidents": ("routes.incidents", "incidents_bp", "/api/incidents"),
+    "users": ("routes.users", "users_bp", "/api/users"),
+    "predict": ("routes.predict", "predict_bp", "/api/predict"),
+    "sos": ("routes.sos", "sos_bp", "/api/sos"),
+    "donations": ("routes.donations", "donations_bp", "/api/donations"),
+    "nlp": ("routes.nlp", "nlp_bp", "/api"),
+    "jobs": ("routes.jobs", "jobs_bp", "/api/jobs"),
+    "events": ("routes.events", "events_bp", "/api/events"),
+}
+
+class SpooledUploadRequest(Request):
+    """
+    Keep uploaded files in memory up to IN_MEMORY_UPLOAD_MAX_BYTES before
+    spilling to a temporary file (Werkzeug's default threshold is 500 KB),
+    so typical voice recordings are processed without touching disk.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        max_size = Config.IN_MEMORY_UPLOAD_MAX_BYTES
+        return tempfile.SpooledTemporaryFile(max_size=max_size, mode="rb+")
+
+def create_app(config_object=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.request_class = SpooledUploadRequest
+    app.config.from_object(config_object)
 
-    # Enable CORS for all routes matching /api/*
-    CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
+    # Enable CORS for all routes matching /api/*; list pages link to each other through headers
+    CORS(
+        app,
+        resources={r"/api/*": {"origins": "*"}},
+        supports_credentials=True,
+        expose_headers=["Link", "X-Next-Cursor", "X-Prev-Cursor"],
+    )
 
     # Initialize the database and set up migrations
     db.init_app(app)
     migrate = Migrate(app, db)
 
-    # Register blueprints with their URL prefixes
-    app.register_blueprint(auth_bp, url_prefix="/api/auth")
-    app.register_blueprint(incidents_bp, url_prefix="/api/incidents")
-    app.register_blueprint(users_bp, url_prefix="/api/users")
-    app.register_blueprint(predict_bp, url_prefix="/api/predict")
-    app.register_blueprint(sos_bp, url_prefix="/api/sos")
-    app.register_blueprint(donations_bp, url_prefix="/api/donations")
-    app.register_blueprint(nlp_bp, url_prefix="/api")
+    # Register the enabled blueprints with their URL prefixes
+    enabled = app.config.get("ENABLED_BLUEPRINTS", list(BLUEPRINTS))
+    unknown = set(enabled) - set(BLUEPRINTS)
+    if unknown:
+        raise ValueError(f"Unknown blueprints in ENABLED_BLUEPRINTS: {', '.join(sorted(unknown))}")
+    for name in enabled:
+        module_name, attribute, url_prefix = BLUEPRINTS[name]
+        blueprint = getattr(importlib.import_module(module_name), attribute)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+    app.register_blueprint(health_bp, url_prefix="/api/health")
+    # Only a process serving GET /api/events/stream publishes change events
+    events.configure(
+        app.config.get("EVENTS_BUFFER_SIZE", 1000), app.config.get("EVENTS_LOCK_PATH"), serve="events" in enabled
+    )
+
+    # The accident detection model lives either in this process or in each
+    # inference worker process
+    if "predict" in enabled:
+        from services.detector import detector
+        from services.worker_pool import worker_pool
+
+        if app.config.get("PREDICT_WORKERS", 0) > 0:
+            worker_pool.init_app(app)
+        else:
+            detector.init_app(app)
+            registry.register("detector", detector.get)
 
+    # Start loading the registered models according to MODEL_LOADING
+    registry.init_app(app)
 
     return app
 
@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# Reproducible load benchmarks, run from the backend directory, e.g.
+#   python -m benchmarks.predict_bench --concurrency 1,4,16
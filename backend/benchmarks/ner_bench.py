@@ -0,0 +1,153 @@
+# benchmarks/ner_bench.py
+"""
+Compare entity-extraction throughput and accuracy of the NER backends
+(default full-precision pipeline, dynamically quantized int8, ONNX Runtime).
+
+Accuracy is measured against the default pipeline's entities as reference
+(precision/recall/F1 over (entity_group, word) pairs, plus agreement on the
+location list extract_details() would return), so the fastest backend that
+stays close enough can be chosen with NER_BACKEND.
+
+    python -m benchmarks.ner_bench
+    python -m benchmarks.ner_bench --backends default,quantized --concurrency 8 --repeat 5
+    python -m benchmarks.ner_bench --texts transcripts.txt --json ner.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_TRANSCRIPTS = [
+    "There has been a serious car crash on Mumbai Pune Expressway near Lonavala",
+    "Fire in a building at Connaught Place in New Delhi please send help",
+    "My father is having a heart attack we are at Sector 17 Chandigarh",
+    "Critical injury after a bus accident in Bangalore near Silk Board junction",
+    "Flood water is entering houses in Patna near Gandhi Maidan",
+    "Minor accident at Marine Drive no one is badly hurt",
+    "Earthquake tremors felt in Guwahati some buildings have cracks",
+    "A truck overturned on the highway outside Jaipur and the driver is trapped",
+    "Severe fire at the chemical factory in Ahmedabad workers are inside",
+    "Two bikes collided at MG Road in Pune one person is bleeding",
+    "Landslide blocked the road to Shimla cars are stuck",
+    "Gas leak reported in an apartment in Hyderabad near Banjara Hills",
+    "Child drowning at Juhu Beach in Mumbai need lifeguards",
+    "Building collapse in Kolkata near Howrah Bridge people trapped",
+    "Serious accident at the Chennai Central railway crossing",
+    "Elderly woman fell down the stairs at Lajpat Nagar she cannot move",
+]
+
+
+def entity_set(entities):
+    return {(e["entity_group"], e["word"].strip().lower()) for e in entities}
+
+
+def locations(entities):
+    return sorted(e["word"] for e in entities if e["entity_group"] in ("LOC", "GPE"))
+
+
+def score(reference, candidate):
+    tp = fp = fn = 0
+    location_agreement = 0
+    for ref, cand in zip(reference, candidate):
+        ref_set, cand_set = entity_set(ref), entity_set(cand)
+        tp += len(ref_set & cand_set)
+        fp += len(cand_set - ref_set)
+        fn += len(ref_set - cand_set)
+        location_agreement += int(locations(ref) == locations(cand))
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+        "location_agreement": round(location_agreement / len(reference), 4) if reference else 1.0,
+    }
+
+
+def bench_backend(backend, model_name, texts, concurrency, repeat, max_batch_size, max_wait_ms):
+    from services.ner import build_pipeline, NERService
+
+    started = time.perf_counter()
+    ner_pipeline = build_pipeline(backend, model_name)
+    load_seconds = time.perf_counter() - started
+    ner_pipeline(texts[0])  # warm-up
+
+    # One text per call, as extract_details() did before the service existed
+    started = time.perf_counter()
+    for _ in range(repeat):
+        outputs = [ner_pipeline(text) for text in texts]
+    sequential = len(texts) * repeat / (time.perf_counter() - started)
+
+    # Concurrent callers through the batching service (cache disabled)
+    service = NERService(ner_pipeline, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, cache_size=0)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(repeat):
+            list(pool.map(service, texts))
+    batched = len(texts) * repeat / (time.perf_counter() - started)
+
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "sequential_texts_per_second": round(sequential, 2),
+        "batched_texts_per_second": round(batched, 2),
+        "avg_batch_size": service.batcher.stats()["avg_batch_size"],
+    }, outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="default,quantized,onnx", help="comma separated backends")
+    parser.add_argument("--model", default=None, help="Hugging Face model name (default: NER_MODEL)")
+    parser.add_argument("--texts", help="file with one transcript per line (default: built-in samples)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, BACKEND_DIR)
+    from config import Config
+
+    model_name = args.model or Config.NER_MODEL
+    if args.texts:
+        with open(args.texts) as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = SAMPLE_TRANSCRIPTS
+
+    results = []
+    reference = None
+    for backend in args.backends.split(","):
+        try:
+            result, outputs = bench_backend(
+                backend, model_name, texts, args.concurrency, args.repeat, args.max_batch_size, args.max_wait_ms
+            )
+        except ImportError as e:
+            print(f"{backend}: skipped ({e})")
+            continue
+        if reference is None:
+            reference = outputs
+        result["accuracy_vs_reference"] = score(reference, outputs)
+        results.append(result)
+
+    print(f"{len(texts)} texts x {args.repeat}, model={model_name}, reference={results[0]['backend'] if results else '-'}")
+    print(f"{'backend':<11}{'load s':>8}{'seq/s':>9}{'batched/s':>11}{'avg batch':>11}{'F1':>8}{'loc agree':>11}")
+    for r in results:
+        acc = r["accuracy_vs_reference"]
+        print(f"{r['backend']:<11}{r['load_seconds']:>8}{r['sequential_texts_per_second']:>9}"
+              f"{r['batched_texts_per_second']:>11}{r['avg_batch_size']:>11}{acc['f1']:>8}{acc['location_agreement']:>11}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
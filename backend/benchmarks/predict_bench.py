@@ -0,0 +1,183 @@
+# benchmarks/predict_bench.py
+"""
+Replay a corpus of sample images against /api/predict at fixed concurrency
+levels and report end-to-end latency percentiles, images/sec, and the
+per-stage histograms collected by the server (GET /api/predict/metrics).
+
+Runs against an in-process app by default (the result cache is disabled so
+every request reaches the model), or against a running server with --url.
+
+    python -m benchmarks.predict_bench
+    python -m benchmarks.predict_bench --concurrency 1,8,32 --requests 200 --mode multipart --boxes-only
+    python -m benchmarks.predict_bench --url http://127.0.0.1:5000 --json results.json
+"""
+import argparse
+import base64
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS = [
+    os.path.join(BACKEND_DIR, "runs", "detect", "*", "*.jpg"),
+    os.path.join(BACKEND_DIR, "uploads", "*.jpg"),
+]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class InProcessClient:
+    """Talks to an app created in this process through Flask test clients (one per thread)"""
+
+    def __init__(self):
+        os.environ.setdefault("PREDICT_CACHE_SIZE", "0")
+        sys.path.insert(0, BACKEND_DIR)
+        from app import create_app
+
+        self.app = create_app()
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, "client"):
+            self._local.client = self.app.test_client()
+        return self._local.client
+
+    def request(self, method, path, body=None, content_type=None):
+        response = self._client().open(path, method=method, data=body, content_type=content_type)
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    """Talks to a running server over HTTP"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, body=None, content_type=None):
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        if content_type:
+            req.add_header("Content-Type", content_type)
+        try:
+            with urllib.request.urlopen(req, timeout=120) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def build_payload(image_bytes, mode, boxes_only):
+    """Return (path, body, content_type) for one request in the given upload mode"""
+    query = "?boxes_only=true" if boxes_only else ""
+    if mode == "raw":
+        return "/api/predict" + query, image_bytes, "image/jpeg"
+    if mode == "multipart":
+        boundary = "----resqbridgebench"
+        body = (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="image"; filename="frame.jpg"\r\n'
+            "Content-Type: image/jpeg\r\n\r\n"
+        ).encode() + image_bytes + f"\r\n--{boundary}--\r\n".encode()
+        return "/api/predict" + query, body, f"multipart/form-data; boundary={boundary}"
+    data_url = "data:image/jpeg;base64," + base64.b64encode(image_bytes).decode()
+    body = json.dumps({"image": data_url, "boxes_only": boxes_only}).encode()
+    return "/api/predict", body, "application/json"
+
+
+def run_level(client, payloads, concurrency, total_requests):
+    client.request("DELETE", "/api/predict/metrics")
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        path, body, content_type = payloads[i % len(payloads)]
+        started = time.perf_counter()
+        status, _ = client.request("POST", path, body, content_type)
+        elapsed = (time.perf_counter() - started) * 1000.0
+        with lock:
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total_requests)))
+    wall = time.perf_counter() - started
+
+    _, stages = client.request("GET", "/api/predict/metrics")
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "images_per_second": round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+        },
+        "stages": json.loads(stages or b"{}"),
+    }
+
+
+def print_level(result):
+    lat = result["latency_ms"]
+    print(f"\nconcurrency={result['concurrency']} requests={result['requests']} errors={result['errors']} "
+          f"images/sec={result['images_per_second']} p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms")
+    print(f"  {'stage':<26}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'per sec':>10}")
+    for name, stage in result["stages"].items():
+        print(f"  {name:<26}{stage['count']:>7}{stage['p50_ms']:>10}{stage['p95_ms']:>10}"
+              f"{stage['p99_ms']:>10}{stage['per_second']:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", nargs="*", help="image files or globs (default: bundled sample images)")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=50, help="requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=3, help="unmeasured requests before the first level")
+    parser.add_argument("--mode", choices=("base64", "multipart", "raw"), default="base64")
+    parser.add_argument("--boxes-only", action="store_true", help="skip the annotated image in responses")
+    parser.add_argument("--url", help="benchmark a running server instead of an in-process app")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    patterns = args.images or DEFAULT_CORPUS
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    if not paths:
+        parser.error("no images found")
+    payloads = []
+    for path in paths:
+        with open(path, "rb") as f:
+            payloads.append(build_payload(f.read(), args.mode, args.boxes_only))
+
+    client = HttpClient(args.url) if args.url else InProcessClient()
+    for i in range(args.warmup):
+        client.request("POST", *payloads[i % len(payloads)])
+
+    print(f"{len(paths)} images, mode={args.mode}, boxes_only={args.boxes_only}")
+    results = []
+    for level in (int(c) for c in args.concurrency.split(",")):
+        result = run_level(client, payloads, level, args.requests)
+        results.append(result)
+        print_level(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
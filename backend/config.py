@@ -1,8 +1,118 @@
 import os
+import tempfile
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key_here")
     SQLALCHEMY_DATABASE_URI = "sqlite:///database.db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = "your_jwt_secret_key_here"  # Required for JWT Authentication
-    UPLOAD_FOLDER = "uploads"
\ No newline at end of file
+    UPLOAD_FOLDER = "uploads"
+    # Blueprints served by this process, e.g. "auth,incidents,users,sos,donations" for a CRUD-only worker
+    ENABLED_BLUEPRINTS = [
+        name.strip()
+        for name in os.getenv("ENABLED_BLUEPRINTS", "auth,incidents,users,predict,sos,donations,nlp,jobs,events").split(",")
+        if name.strip()
+    ]
+    # When heavy models (Vosk, NER, detector) are loaded: lazy, background or eager
+    MODEL_LOADING = os.getenv("MODEL_LOADING", "background")
+    # Uploaded files up to this size are buffered in memory instead of a temp file
+    IN_MEMORY_UPLOAD_MAX_BYTES = int(os.getenv("IN_MEMORY_UPLOAD_MAX_BYTES", str(16 * 1024 * 1024)))
+
+    # Accident detection: micro-batching of concurrent /api/predict requests
+    PREDICT_MAX_BATCH_SIZE = int(os.getenv("PREDICT_MAX_BATCH_SIZE", "8"))
+    PREDICT_MAX_WAIT_MS = float(os.getenv("PREDICT_MAX_WAIT_MS", "10"))
+    # Number of recent predictions whose annotated image can still be rendered on demand
+    PREDICT_RENDER_CACHE_SIZE = int(os.getenv("PREDICT_RENDER_CACHE_SIZE", "64"))
+    # Result cache for identical / near-duplicate uploads (perceptual hash distance in bits)
+    PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "512"))
+    PREDICT_CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", "600"))
+    PREDICT_CACHE_MAX_DISTANCE = int(os.getenv("PREDICT_CACHE_MAX_DISTANCE", "4"))
+    # Detector lifecycle (services/detector.py)
+    PREDICT_MODEL_PATH = os.getenv("PREDICT_MODEL_PATH")
+    PREDICT_IMGSZ = int(os.getenv("PREDICT_IMGSZ", "640"))
+    PREDICT_WARMUP_RUNS = int(os.getenv("PREDICT_WARMUP_RUNS", "2"))
+    PREDICT_INTRA_OP_THREADS = int(os.getenv("PREDICT_INTRA_OP_THREADS", "0"))  # 0 = runtime default
+    PREDICT_INTER_OP_THREADS = int(os.getenv("PREDICT_INTER_OP_THREADS", "0"))
+    PREDICT_GRAPH_OPT_LEVEL = os.getenv("PREDICT_GRAPH_OPT_LEVEL", "all")  # disable, basic, extended, all
+    # Inference worker processes (services/worker_pool.py); 0 runs inference in the web process
+    PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", "0"))
+    PREDICT_WORKER_TIMEOUT = float(os.getenv("PREDICT_WORKER_TIMEOUT", "30"))
+    PREDICT_HEALTH_INTERVAL = float(os.getenv("PREDICT_HEALTH_INTERVAL", "1"))
+    # Restarts of a failing worker back off exponentially from PREDICT_WORKER_RESTART_BACKOFF seconds, up to this many in a row
+    PREDICT_WORKER_MAX_RESTARTS = int(os.getenv("PREDICT_WORKER_MAX_RESTARTS", "5"))
+    PREDICT_WORKER_RESTART_BACKOFF = float(os.getenv("PREDICT_WORKER_RESTART_BACKOFF", "1"))
+    # Video / MJPEG stream detection (POST /api/predict/stream)
+    PREDICT_STREAM_SAMPLE_FPS = float(os.getenv("PREDICT_STREAM_SAMPLE_FPS", "2"))
+    PREDICT_STREAM_MAX_INTERVAL = float(os.getenv("PREDICT_STREAM_MAX_INTERVAL", "2"))  # seconds between samples of a static scene
+    PREDICT_STREAM_DIFF_THRESHOLD = float(os.getenv("PREDICT_STREAM_DIFF_THRESHOLD", "4"))
+    PREDICT_STREAM_MAX_INFLIGHT = int(os.getenv("PREDICT_STREAM_MAX_INFLIGHT", "4"))
+    PREDICT_STREAM_MAX_FRAME_BYTES = int(os.getenv("PREDICT_STREAM_MAX_FRAME_BYTES", str(8 * 1024 * 1024)))
+    # Decode uploads directly at the model's working resolution (JPEG DCT scaling)
+    PREDICT_REDUCED_DECODE = os.getenv("PREDICT_REDUCED_DECODE", "true").lower() in ("1", "true", "yes")
+    # Tiled inference (?tiled=true) for images whose long side is at least PREDICT_TILE_MIN_SIDE
+    PREDICT_TILE_SIZE = int(os.getenv("PREDICT_TILE_SIZE", "0"))  # 0 = PREDICT_IMGSZ
+    PREDICT_TILE_OVERLAP = float(os.getenv("PREDICT_TILE_OVERLAP", "0.2"))
+    PREDICT_TILE_MIN_SIDE = int(os.getenv("PREDICT_TILE_MIN_SIDE", "2000"))
+    PREDICT_TILE_NMS_IOU = float(os.getenv("PREDICT_TILE_NMS_IOU", "0.5"))
+    # Live transcription sessions (POST /api/nlp/stream)
+    NLP_STREAM_IDLE_TIMEOUT = float(os.getenv("NLP_STREAM_IDLE_TIMEOUT", "120"))
+    NLP_STREAM_MAX_SESSIONS = int(os.getenv("NLP_STREAM_MAX_SESSIONS", "100"))
+    NLP_STREAM_READ_BYTES = int(os.getenv("NLP_STREAM_READ_BYTES", "8000"))
+    # Named-entity recognition for transcripts (services/ner.py); backend: default, quantized, onnx
+    NER_BACKEND = os.getenv("NER_BACKEND", "default")
+    NER_MODEL = os.getenv("NER_MODEL", "dbmdz/bert-large-cased-finetuned-conll03-english")
+    NER_MAX_BATCH_SIZE = int(os.getenv("NER_MAX_BATCH_SIZE", "16"))
+    NER_MAX_WAIT_MS = float(os.getenv("NER_MAX_WAIT_MS", "5"))
+    NER_CACHE_SIZE = int(os.getenv("NER_CACHE_SIZE", "1024"))
+    # Keyword and gazetteer dictionaries for extract_details (POST /api/nlp/keywords/reload re-reads them)
+    EMERGENCY_KEYWORDS_PATH = os.getenv("EMERGENCY_KEYWORDS_PATH", os.path.join(DATA_DIR, "emergency_keywords.txt"))
+    SEVERITY_KEYWORDS_PATH = os.getenv("SEVERITY_KEYWORDS_PATH", os.path.join(DATA_DIR, "severity_keywords.txt"))
+    GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", os.path.join(DATA_DIR, "gazetteer.txt"))
+    # Asynchronous jobs for /api/jobs/predict and /api/jobs/nlp
+    JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+    JOBS_MAX_QUEUE = int(os.getenv("JOBS_MAX_QUEUE", "100"))
+    JOBS_RESULT_TTL = float(os.getenv("JOBS_RESULT_TTL", "600"))  # seconds a finished job stays pollable
+    JOBS_CALLBACK_TIMEOUT = float(os.getenv("JOBS_CALLBACK_TIMEOUT", "5"))
+    # Comma-separated hosts callback_url may point to; when empty any public (non-private, non-loopback) host is allowed
+    JOBS_CALLBACK_ALLOWED_HOSTS = [h.strip() for h in os.getenv("JOBS_CALLBACK_ALLOWED_HOSTS", "").split(",") if h.strip()]
+    # Parallel transcription of long recordings: silence-split segments over a process pool (0 workers disables)
+    # Each worker is a separate process holding its own Vosk model, so keep this small
+    NLP_PARALLEL_WORKERS = int(os.getenv("NLP_PARALLEL_WORKERS", "2"))
+    NLP_PARALLEL_MIN_SECONDS = float(os.getenv("NLP_PARALLEL_MIN_SECONDS", "60"))
+    NLP_PARALLEL_SEGMENT_SECONDS = float(os.getenv("NLP_PARALLEL_SEGMENT_SECONDS", "30"))
+    NLP_VAD_SILENCE_DBFS = float(os.getenv("NLP_VAD_SILENCE_DBFS", "-40"))
+    NLP_VAD_MIN_SILENCE_MS = int(os.getenv("NLP_VAD_MIN_SILENCE_MS", "400"))
+    # Audio normalization before recognition: resample rate and silence trim threshold
+    NLP_SAMPLE_RATE = int(os.getenv("NLP_SAMPLE_RATE", "16000"))
+    NLP_TRIM_SILENCE_DBFS = float(os.getenv("NLP_TRIM_SILENCE_DBFS", "-45"))
+    # Background SOS media uploads: concurrent uploads, extra attempts per file and per-attempt timeout (seconds)
+    SOS_UPLOAD_WORKERS = int(os.getenv("SOS_UPLOAD_WORKERS", "4"))
+    SOS_UPLOAD_RETRIES = int(os.getenv("SOS_UPLOAD_RETRIES", "2"))
+    SOS_UPLOAD_TIMEOUT = float(os.getenv("SOS_UPLOAD_TIMEOUT", "60"))
+    # Media storage for SOS uploads: "cloudinary" or "local" (files under MEDIA_LOCAL_DIR served at MEDIA_LOCAL_URL)
+    MEDIA_STORAGE = os.getenv("MEDIA_STORAGE", "cloudinary")
+    MEDIA_LOCAL_DIR = os.getenv("MEDIA_LOCAL_DIR", os.path.join(UPLOAD_FOLDER, "media"))
+    MEDIA_LOCAL_URL = os.getenv("MEDIA_LOCAL_URL", "/api/sos/media")
+    MEDIA_CHUNK_SIZE = int(os.getenv("MEDIA_CHUNK_SIZE", str(6 * 1024 * 1024)))  # Cloudinary needs >= 5 MB
+    MEDIA_INDEX_SIZE = int(os.getenv("MEDIA_INDEX_SIZE", "4096"))  # content hashes whose URL is remembered
+    # Also ask Cloudinary's rate-limited Admin API for content missing from the stored_media table
+    MEDIA_REMOTE_LOOKUP = os.getenv("MEDIA_REMOTE_LOOKUP", "false").lower() in ("1", "true", "yes")
+    # Keyset pagination of list endpoints (?limit=, ?cursor=; ?all=true returns every row)
+    PAGE_SIZE = int(os.getenv("PAGE_SIZE", "50"))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+    # Change feed (GET /api/events/stream): events kept for Last-Event-ID resume, keep-alive interval, client retry
+    EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "1000"))
+    EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "3000"))
+    # The feed is in-process: this lock lets only one server process serve it ("" turns the check off)
+    EVENTS_LOCK_PATH = os.getenv("EVENTS_LOCK_PATH", os.path.join(tempfile.gettempdir(), "resqbridge-events.lock"))
+    # Delta sync (?since=) of list endpoints: how long deletions are remembered, and the overlap between syncs
+    TOMBSTONE_RETENTION_DAYS = int(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+    SYNC_SKEW_SECONDS = float(os.getenv("SYNC_SKEW_SECONDS", "2"))
+    # Largest search radius (km) accepted by the /nearby and /nearest endpoints
+    GEO_MAX_RADIUS_KM = float(os.getenv("GEO_MAX_RADIUS_KM", "100"))
+    # Bulk ingest (POST /api/incidents/bulk, /api/sos/bulk): records per request and per insert transaction
+    BULK_MAX_RECORDS = int(os.getenv("BULK_MAX_RECORDS", "10000"))
+    BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
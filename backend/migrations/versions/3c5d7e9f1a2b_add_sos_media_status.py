@@ -0,0 +1,26 @@
+"""Add media_status to SOS reports
+
+Revision ID: 3c5d7e9f1a2b
+Revises: 10b398f37a12
+Create Date: 2026-10-18 10:12:04.518233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c5d7e9f1a2b'
+down_revision = '10b398f37a12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('sos_reports', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('media_status', sa.String(length=16), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('sos_reports', schema=None) as batch_op:
+        batch_op.drop_column('media_status')
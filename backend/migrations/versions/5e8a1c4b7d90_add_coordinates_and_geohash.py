@@ -0,0 +1,50 @@
+"""Add coordinates and geohash index to incidents and SOS reports
+
+Revision ID: 5e8a1c4b7d90
+Revises: 3c5d7e9f1a2b
+Create Date: 2026-10-18 11:02:37.104952
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from services.geo import coordinates_for
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a1c4b7d90'
+down_revision = '3c5d7e9f1a2b'
+branch_labels = None
+depends_on = None
+
+TABLES = ('incidents', 'sos_reports')
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+            batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+            batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+            batch_op.create_index(batch_op.f(f'ix_{table}_geohash'), ['geohash'], unique=False)
+
+    # Fill in the coordinates of existing "lat,lng" locations
+    bind = op.get_bind()
+    for table in TABLES:
+        rows = bind.execute(sa.text(f'SELECT id, location FROM {table}')).fetchall()
+        updates = [{'id': row.id, **coordinates_for(row.location)} for row in rows]
+        updates = [u for u in updates if u['geohash'] is not None]
+        if updates:
+            bind.execute(
+                sa.text(f'UPDATE {table} SET latitude = :latitude, longitude = :longitude, geohash = :geohash WHERE id = :id'),
+                updates,
+            )
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(batch_op.f(f'ix_{table}_geohash'))
+            batch_op.drop_column('geohash')
+            batch_op.drop_column('longitude')
+            batch_op.drop_column('latitude')
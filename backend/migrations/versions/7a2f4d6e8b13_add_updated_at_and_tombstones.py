@@ -0,0 +1,54 @@
+"""Add updated_at to SOS reports, index change stamps, add tombstones
+
+Revision ID: 7a2f4d6e8b13
+Revises: 5e8a1c4b7d90
+Create Date: 2026-10-18 11:48:20.693417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2f4d6e8b13'
+down_revision = '5e8a1c4b7d90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=32), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tombstones_deleted_at'), ['deleted_at'], unique=False)
+        batch_op.create_index('ix_tombstones_entity_deleted_at', ['entity', 'deleted_at'], unique=False)
+
+    with op.batch_alter_table('sos_reports', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # Rows never updated have no change stamp yet; start from when they were reported
+    op.execute('UPDATE incidents SET updated_at = reported_at WHERE updated_at IS NULL')
+    op.execute('UPDATE sos_reports SET updated_at = reported_at WHERE updated_at IS NULL')
+
+    with op.batch_alter_table('incidents', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_incidents_updated_at'), ['updated_at'], unique=False)
+    with op.batch_alter_table('sos_reports', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_sos_reports_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sos_reports', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sos_reports_updated_at'))
+        batch_op.drop_column('updated_at')
+    with op.batch_alter_table('incidents', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_incidents_updated_at'))
+
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_tombstones_entity_deleted_at')
+        batch_op.drop_index(batch_op.f('ix_tombstones_deleted_at'))
+    op.drop_table('tombstones')
@@ -0,0 +1,31 @@
+"""Add FTS5 full-text indexes over incident and SOS report text
+
+Revision ID: 9c4e6a8d2f57
+Revises: 7a2f4d6e8b13
+Create Date: 2026-10-18 12:25:41.338106
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from services.search import FTS_TABLES, create_fts, fts_drop_ddl
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e6a8d2f57'
+down_revision = '7a2f4d6e8b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Virtual tables and triggers are SQLite-specific; other databases use the LIKE fallback
+    create_fts(op.get_bind())
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in FTS_TABLES:
+        for statement in fts_drop_ddl(table):
+            op.execute(sa.text(statement))
@@ -0,0 +1,40 @@
+"""Add composite indexes for list, filter and proximity queries
+
+Revision ID: b1d3f5a7c9e2
+Revises: 9c4e6a8d2f57
+Create Date: 2026-10-18 13:04:12.871530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1d3f5a7c9e2'
+down_revision = '9c4e6a8d2f57'
+branch_labels = None
+depends_on = None
+
+# Index name -> (table, columns). users.email is already indexed by its
+# unique constraint, which login and registration look up.
+INDEXES = {
+    'ix_incidents_reported_at_id': ('incidents', ['reported_at', 'id']),
+    'ix_incidents_status_reported_at_id': ('incidents', ['status', 'reported_at', 'id']),
+    'ix_sos_reports_reported_at_id': ('sos_reports', ['reported_at', 'id']),
+    'ix_sos_reports_status_reported_at_id': ('sos_reports', ['status', 'reported_at', 'id']),
+    'ix_sos_reports_status_geohash': ('sos_reports', ['status', 'geohash']),
+    'ix_donations_donated_at_id': ('donations', ['donated_at', 'id']),
+}
+
+
+def upgrade():
+    for name, (table, columns) in INDEXES.items():
+        op.create_index(name, table, columns, unique=False)
+    # Give the query planner statistics for the new indexes
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(sa.text('ANALYZE'))
+
+
+def downgrade():
+    for name, (table, _) in reversed(list(INDEXES.items())):
+        op.drop_index(name, table_name=table)
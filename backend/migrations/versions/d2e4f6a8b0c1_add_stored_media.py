@@ -0,0 +1,30 @@
+"""Add stored_media: content hash -> URL of media already in storage
+
+Revision ID: d2e4f6a8b0c1
+Revises: b1d3f5a7c9e2
+Create Date: 2026-10-18 16:05:41.227305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e4f6a8b0c1'
+down_revision = 'b1d3f5a7c9e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stored_media',
+    sa.Column('backend', sa.String(length=16), nullable=False),
+    sa.Column('key', sa.String(length=128), nullable=False),
+    sa.Column('url', sa.String(length=256), nullable=False),
+    sa.Column('stored_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('backend', 'key')
+    )
+
+
+def downgrade():
+    op.drop_table('stored_media')
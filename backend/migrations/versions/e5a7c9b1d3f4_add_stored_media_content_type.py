@@ -0,0 +1,26 @@
+"""Add content_type to stored_media
+
+Revision ID: e5a7c9b1d3f4
+Revises: d2e4f6a8b0c1
+Create Date: 2026-10-18 21:40:17.903516
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c9b1d3f4'
+down_revision = 'd2e4f6a8b0c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('stored_media', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_type', sa.String(length=128), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('stored_media', schema=None) as batch_op:
+        batch_op.drop_column('content_type')
@@ -31,7 +31,16 @@ class Incident(db.Model):
     contact = db.Column(db.String(64), nullable=True)      # New field for contact number
     status = db.Column(db.String(64), nullable=False, default="Pending")  # Pending, In Progress, Resolved
     reported_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    latitude = db.Column(db.Float, nullable=True)   # parsed from location when it is "lat,lng"
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)
+    # List pages (newest first) overall and by status
+    __table_args__ = (
+        db.Index('ix_incidents_reported_at_id', 'reported_at', 'id'),
+        db.Index('ix_incidents_status_reported_at_id', 'status', 'reported_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<Incident {self.title}>'
 
@@ -43,9 +52,20 @@ class SOSReport(db.Model):
     location = db.Column(db.String(256), nullable=False)  # e.g., "lat,lng"
     status = db.Column(db.String(64), nullable=False, default="Pending")
     reported_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     audio_url = db.Column(db.String(256), nullable=True)
     image_url = db.Column(db.String(256), nullable=True)
     video_url = db.Column(db.String(256), nullable=True)
+    media_status = db.Column(db.String(16), nullable=True)  # None (no media), pending, complete, failed
+    latitude = db.Column(db.Float, nullable=True)   # parsed from location when it is "lat,lng"
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)
+    # List pages (newest first) overall and by status; nearest pending reports
+    __table_args__ = (
+        db.Index('ix_sos_reports_reported_at_id', 'reported_at', 'id'),
+        db.Index('ix_sos_reports_status_reported_at_id', 'status', 'reported_at', 'id'),
+        db.Index('ix_sos_reports_status_geohash', 'status', 'geohash'),
+    )
 
     def __repr__(self):
         return f'<SOSReport {self.title}>'
@@ -58,10 +78,35 @@ class Donation(db.Model):
     amount = db.Column(db.Float, nullable=False)
     message = db.Column(db.Text, nullable=True)
     donated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ix_donations_donated_at_id', 'donated_at', 'id'),)
 
     def __repr__(self):
         return f'<Donation {self.donor_name}: ${self.amount}>'
 
+class Tombstone(db.Model):
+    """Record of a deleted row, so delta sync (?since=) can report deletions"""
+    __tablename__ = 'tombstones'
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(32), nullable=False)  # incidents, sos, donations
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    __table_args__ = (db.Index('ix_tombstones_entity_deleted_at', 'entity', 'deleted_at'),)
+
+    def __repr__(self):
+        return f'<Tombstone {self.entity} {self.entity_id}>'
+
+class StoredMedia(db.Model):
+    """Media already in storage by content hash, so repeated uploads reuse the URL"""
+    __tablename__ = 'stored_media'
+    backend = db.Column(db.String(16), primary_key=True)  # MEDIA_STORAGE the file was stored with
+    key = db.Column(db.String(128), primary_key=True)  # "<folder>/<sha256>"
+    url = db.Column(db.String(256), nullable=False)
+    content_type = db.Column(db.String(128))  # as uploaded; local files are named by hash alone
+    stored_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<StoredMedia {self.backend}:{self.key}>'
+
 class Setting(db.Model):
     __tablename__ = 'settings'
     id = db.Column(db.Integer, primary_key=True)
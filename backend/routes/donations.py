@@ -1,25 +1,49 @@
 # routes/donations.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models import db, Donation
 from datetime import datetime
+from services.pagination import InvalidPage, paginate_request
+from services.sync import delta_response, list_etag, not_modified, record_tombstone
 
 donations_bp = Blueprint('donations', __name__, url_prefix='/api/donations')
 
-@donations_bp.route('', methods=['GET'])
-def get_donations():
-    """
-    Retrieve all donations ordered by donation time (most recent first).
-    """
-    donations = Donation.query.order_by(Donation.donated_at.desc()).all()
-    donation_list = [{
+def serialize_donation(d):
+    return {
         "id": d.id,
         "donor_name": d.donor_name,
         "donor_email": d.donor_email,
         "amount": d.amount,
         "message": d.message,
         "donated_at": d.donated_at.isoformat()
-    } for d in donations]
-    return jsonify(donation_list), 200
+    }
+
+@donations_bp.route('', methods=['GET'])
+def get_donations():
+    """
+    Retrieve donations ordered by donation time (most recent first), one page
+    at a time: ?limit= and ?cursor=; ?all=true returns every donation.
+    ?since=<timestamp> returns only the donations made and deleted since then.
+    """
+    etag = list_etag(Donation, Donation.donated_at, 'donations', request.args)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    if request.args.get('since'):
+        return delta_response(Donation.query, Donation.donated_at, 'donations', serialize_donation, etag)
+
+    try:
+        donations, headers = paginate_request(
+            Donation.query,
+            [(Donation.donated_at, True), (Donation.id, True)],
+            request.args,
+            request.base_url,
+            current_app.config.get('PAGE_SIZE', 50),
+            current_app.config.get('MAX_PAGE_SIZE', 500),
+        )
+    except InvalidPage as e:
+        return jsonify({"error": str(e)}), 400
+    donation_list = [serialize_donation(d) for d in donations]
+    return jsonify(donation_list), 200, {**headers, 'ETag': f'W/"{etag}"'}
 
 @donations_bp.route('', methods=['POST'])
 def create_donation():
@@ -56,5 +80,6 @@ def delete_donation(donation_id):
     if not donation:
         return jsonify({"error": "Donation not found"}), 404
     db.session.delete(donation)
+    record_tombstone('donations', donation_id, current_app.config.get('TOMBSTONE_RETENTION_DAYS', 30))
     db.session.commit()
     return jsonify({"message": "Donation deleted"}), 200
@@ -0,0 +1,70 @@
+# routes/events.py
+import json
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from services.events import events, BrokerUnavailable
+
+events_bp = Blueprint('events', __name__, url_prefix='/api/events')
+
+TOPICS = ('sos', 'incidents')
+
+def format_event(event):
+    """One change event as a Server-Sent Event ("<topic>.<action>", data is the record)"""
+    data = json.dumps({'action': event['action'], 'data': event['data'], 'time': event['time']})
+    return f"id: {event['id']}\nevent: {event['topic']}.{event['action']}\ndata: {data}\n\n"
+
+@events_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events feed of created, updated, resolved and deleted SOS
+    reports and incidents (?topics=sos,incidents to choose); a bulk upload
+    sends one "bulk_create" event with its count and id range. Reconnecting
+    clients send Last-Event-ID (browsers do so automatically, or pass
+    ?last_event_id=) and receive only the events they missed; a "reset"
+    event means those are gone and the lists must be fetched again.
+    """
+    topics = {t.strip() for t in request.args.get('topics', '').split(',') if t.strip()}
+    if topics - set(TOPICS):
+        return jsonify({'error': f"Unknown topics; expected some of {', '.join(TOPICS)}"}), 400
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    # An id from before a restart (or garbage) cannot be resumed: the client reloads
+    last_seq, reset = events.resume_point(last_event_id)
+
+    heartbeat = current_app.config.get('EVENTS_HEARTBEAT_SECONDS', 15)
+    retry_ms = current_app.config.get('EVENTS_RETRY_MS', 3000)
+    try:
+        events.add_subscriber(1)
+    except BrokerUnavailable as e:
+        return jsonify({'error': str(e)}), 503
+
+    def reset_event(seq):
+        return f"id: {events.event_id(seq)}\nevent: reset\ndata: {{}}\n\n"
+
+    def generate():
+        cursor = last_seq
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            if reset:
+                yield reset_event(cursor)
+            while True:
+                batch, cursor, gap = events.since(cursor, topics or None, timeout=heartbeat)
+                if gap:
+                    yield reset_event(cursor)
+                elif batch:
+                    for event in batch:
+                        yield format_event(event)
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            events.add_subscriber(-1)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+@events_bp.route('', methods=['GET'])
+def event_stats():
+    """Last event id, buffered events and connected subscribers"""
+    return jsonify(events.stats()), 200
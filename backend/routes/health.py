@@ -0,0 +1,25 @@
+# routes/health.py
+from flask import Blueprint, jsonify, current_app
+from services.registry import registry
+
+health_bp = Blueprint('health', __name__, url_prefix='/api/health')
+
+@health_bp.route('', methods=['GET'])
+def health():
+    """
+    Report the blueprints served by this process and the load state of every
+    registered model. Always 200: the process is up even while models load.
+    """
+    return jsonify({
+        'status': 'ok',
+        'blueprints': current_app.config.get('ENABLED_BLUEPRINTS', []),
+        'modelLoading': current_app.config.get('MODEL_LOADING'),
+        'models': registry.status(),
+    }), 200
+
+@health_bp.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once every registered model is loaded, 503 before"""
+    models = registry.status()
+    all_ready = all(model['state'] == 'ready' for model in models.values())
+    return jsonify({'ready': all_ready, 'models': models}), 200 if all_ready else 503
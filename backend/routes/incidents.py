@@ -1,27 +1,68 @@
 # routes/incidents.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models import db, Incident
 from datetime import datetime
+from services.pagination import InvalidPage, paginate_request
+from services.geo import coordinates_for, point_from_args, radius_from_args, within_radius
+from services.events import events
+from services.sync import delta_response, list_etag, not_modified, record_tombstone
+from services.bulk import bulk_insert, created_summary, iter_records, summarize
+from services.search import apply_filters
 
 incidents_bp = Blueprint('incidents', __name__, url_prefix='/api/incidents')
 
+def serialize_incident(inc):
+    return {
+        'id': inc.id,
+        'title': inc.title,
+        'description': inc.description,
+        'location': inc.location,
+        'contact': inc.contact,  # Include contact number in the response
+        'reportedAt': inc.reported_at.isoformat(),
+        'updatedAt': inc.updated_at.isoformat() if inc.updated_at else None,
+        'status': inc.status,
+        'latitude': inc.latitude,
+        'longitude': inc.longitude,
+    }
+
 @incidents_bp.route('', methods=['GET'])
 def get_incidents():
     """
-    Retrieve all incidents ordered by reported_at (most recent first).
+    Retrieve incidents ordered by reported_at (most recent first), one page
+    at a time: ?limit= and ?cursor= (from the X-Next-Cursor/X-Prev-Cursor or
+    Link headers); ?all=true returns every incident.
+
+    Filters: ?status= (comma separated), ?from= / ?to= on reportedAt and
+    ?q= full-text search over title and description.
+
+    ?since=<timestamp> returns only incidents created or changed since then
+    plus the ids deleted since then. Responses carry an ETag; a matching
+    If-None-Match gets 304 Not Modified.
     """
     try:
-        incidents = Incident.query.order_by(Incident.reported_at.desc()).all()
-        data = [{
-            'id': inc.id,
-            'title': inc.title,
-            'description': inc.description,
-            'location': inc.location,
-            'contact': inc.contact,  # Include contact number in the response
-            'reportedAt': inc.reported_at.isoformat(),
-            'status': inc.status
-        } for inc in incidents]
-        return jsonify(data), 200
+        etag = list_etag(Incident, Incident.updated_at, 'incidents', request.args)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        try:
+            query = apply_filters(db.session, Incident.query, Incident, request.args, Incident.reported_at)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if request.args.get('since'):
+            return delta_response(query, Incident.updated_at, 'incidents', serialize_incident, etag)
+
+        incidents, headers = paginate_request(
+            query,
+            [(Incident.reported_at, True), (Incident.id, True)],
+            request.args,
+            request.base_url,
+            current_app.config.get('PAGE_SIZE', 50),
+            current_app.config.get('MAX_PAGE_SIZE', 500),
+        )
+        data = [serialize_incident(inc) for inc in incidents]
+        return jsonify(data), 200, {**headers, 'ETag': f'W/"{etag}"'}
+    except InvalidPage as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -56,17 +97,95 @@ def create_incident():
         location=location,
         contact=data.get('contact'),  # Save the contact number
         reported_at=reported_at,
-        status=data.get('status') or 'Pending'
+        status=data.get('status') or 'Pending',
+        **coordinates_for(location)
     )
     
     try:
         db.session.add(inc)
         db.session.commit()
+        events.publish('incidents', 'create', serialize_incident(inc))
         return jsonify({'message': 'Incident created', 'id': inc.id}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def incident_mapping(data):
+    """Column values of an incident record for bulk ingest; raises ValueError if invalid"""
+    title = data.get('title')
+    location = data.get('location')
+    if not title or not location:
+        raise ValueError('Title and location are required')
+    reported_at = datetime.utcnow()
+    if data.get('reportedAt'):
+        try:
+            reported_at = datetime.fromisoformat(data['reportedAt'])
+        except (TypeError, ValueError):
+            raise ValueError('reportedAt must be an ISO 8601 timestamp') from None
+    return {
+        'title': title,
+        'description': data.get('description'),
+        'location': location,
+        'contact': data.get('contact'),
+        'reported_at': reported_at,
+        'updated_at': datetime.utcnow(),
+        'status': data.get('status') or 'Pending',
+        **coordinates_for(location),
+    }
+
+@incidents_bp.route('/bulk', methods=['POST'])
+def bulk_create_incidents():
+    """
+    Create many incidents in one request: a JSON array of incident objects
+    (fields as for POST /api/incidents) or an NDJSON body
+    (Content-Type: application/x-ndjson). Rows are inserted in chunks of
+    BULK_CHUNK_SIZE; every record gets a result ("created" with its id,
+    "invalid" or "failed" with the error) so only failures need resending.
+    """
+    config = current_app.config
+    max_records = config.get('BULK_MAX_RECORDS', 10000)
+    try:
+        records = iter_records(request.mimetype, request.stream, request.get_json)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if isinstance(records, list) and len(records) > max_records:
+        return jsonify({'error': f'A batch may hold at most {max_records} records'}), 413
+
+    results, truncated = bulk_insert(
+        db.session,
+        Incident,
+        records,
+        incident_mapping,
+        chunk_size=config.get('BULK_CHUNK_SIZE', 500),
+        max_records=max_records,
+    )
+    # One event for the whole batch: a large batch would flush the replay buffer
+    created = created_summary(results)
+    if created:
+        events.publish('incidents', 'bulk_create', created)
+    return jsonify(summarize(results, truncated)), 200
+
+@incidents_bp.route('/nearby', methods=['GET'])
+def get_nearby_incidents():
+    """
+    Incidents within ?radius_km= (default 5, at most GEO_MAX_RADIUS_KM) of
+    ?lat=&lng=, nearest first. Optional ?status= filter. Only incidents with a
+    "lat,lng" location are found.
+    """
+    try:
+        lat, lng = point_from_args(request.args)
+        radius_km = radius_from_args(request.args, default=5, max_km=current_app.config.get('GEO_MAX_RADIUS_KM', 100))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = Incident.query
+    if request.args.get('status'):
+        query = query.filter(Incident.status == request.args['status'])
+    results = within_radius(query, Incident, lat, lng, radius_km)
+    return jsonify([
+        {**serialize_incident(inc), 'distanceKm': round(distance, 3)} for inc, distance in results
+    ]), 200
+
 @incidents_bp.route('/<int:id>', methods=['DELETE'])
 def delete_incident(id):
     """
@@ -77,7 +196,9 @@ def delete_incident(id):
         return jsonify({'error': 'Incident not found'}), 404
     try:
         db.session.delete(inc)
+        record_tombstone('incidents', id, current_app.config.get('TOMBSTONE_RETENTION_DAYS', 30))
         db.session.commit()
+        events.publish('incidents', 'delete', {'id': id})
         return jsonify({'message': 'Incident deleted'}), 200
     except Exception as e:
         db.session.rollback()
@@ -98,6 +219,7 @@ def update_incident(id):
 
     try:
         db.session.commit()
+        events.publish('incidents', 'resolve' if incident.status == 'Resolved' else 'update', serialize_incident(incident))
         return jsonify({"message": "Incident updated successfully", "incident": {
             "id": incident.id,
             "status": incident.status,
@@ -0,0 +1,101 @@
+# routes/jobs.py
+from flask import Blueprint, request, jsonify, current_app, url_for
+from services.jobs import JobQueue, QueueFull, InvalidCallback
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+# Global job queue, created on first use
+job_queue = None
+
+def get_job_queue():
+    """Create (once) and return the job queue; jobs run inside an app context"""
+    global job_queue
+    if job_queue is None:
+        app = current_app._get_current_object()
+        job_queue = JobQueue(
+            workers=app.config.get('JOBS_WORKERS', 2),
+            max_queue=app.config.get('JOBS_MAX_QUEUE', 100),
+            result_ttl=app.config.get('JOBS_RESULT_TTL', 600),
+            callback_timeout=app.config.get('JOBS_CALLBACK_TIMEOUT', 5),
+            wrap=app.app_context,
+            callback_hosts=app.config.get('JOBS_CALLBACK_ALLOWED_HOSTS'),
+        )
+    return job_queue
+
+def job_response(job, status_code=200):
+    data = job.to_dict()
+    data['statusUrl'] = url_for('jobs.get_job', job_id=job.id)
+    # The annotated image of a finished prediction is rendered on demand
+    if job.kind == 'predict' and isinstance(job.result, dict) and job.result.get('resultId'):
+        data['result'] = {
+            **job.result,
+            'annotatedImageUrl': url_for('predict.annotated_image', result_id=job.result['resultId']),
+        }
+    return jsonify(data), status_code
+
+def enqueue(kind, fn):
+    try:
+        job = get_job_queue().submit(kind, fn, callback_url=request.args.get('callback_url'))
+    except InvalidCallback as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+    return job_response(job, 202)
+
+@jobs_bp.route('/predict', methods=['POST'])
+def submit_predict():
+    """
+    Queue accident detection. Accepts the same inputs as POST /api/predict;
+    poll GET /api/jobs/<id> or pass ?callback_url= to be notified.
+    """
+    if 'predict' not in current_app.config.get('ENABLED_BLUEPRINTS', []):
+        return jsonify({'error': 'Accident detection is not enabled on this server'}), 404
+    from routes.predict import read_image_request, build_prediction, workers_unavailable
+
+    unavailable = workers_unavailable()
+    if unavailable is not None:
+        return unavailable
+    image_bytes, options = read_image_request()
+    if not image_bytes:
+        return jsonify({'error': 'No image data provided'}), 400
+    return enqueue('predict', lambda job: build_prediction(image_bytes, options, checkpoint=job.checkpoint))
+
+@jobs_bp.route('/nlp', methods=['POST'])
+def submit_nlp():
+    """
+    Queue transcription and detail extraction of an uploaded "audio" file;
+    poll GET /api/jobs/<id> or pass ?callback_url= to be notified.
+    """
+    if 'nlp' not in current_app.config.get('ENABLED_BLUEPRINTS', []):
+        return jsonify({'error': 'Audio analysis is not enabled on this server'}), 404
+    from routes.nlp import analyze_audio
+
+    audio_file = request.files.get('audio')
+    if audio_file is None or audio_file.filename == '':
+        return jsonify({'error': 'No audio file provided'}), 400
+    data = audio_file.read()
+    return enqueue('nlp', lambda job: analyze_audio(data, checkpoint=job.checkpoint))
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Return the status (and result once finished) of a job"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return job_response(job)
+
+@jobs_bp.route('/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancel a job. A queued job is cancelled at once; a running one keeps
+    status "running" with cancelRequested until it reaches its next stage.
+    """
+    job = get_job_queue().cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return job_response(job)
+
+@jobs_bp.route('', methods=['GET'])
+def job_stats():
+    """Queue depth, worker count and job counts by status"""
+    return jsonify(get_job_queue().stats()), 200
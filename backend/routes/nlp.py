@@ -1,13 +1,17 @@
 import os
 import re
 import json
-import wave
 import logging
-from flask import Blueprint, request, jsonify
-from werkzeug.utils import secure_filename
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from vosk import Model as VoskModel, KaldiRecognizer
-from transformers import pipeline
-from pydub import AudioSegment
+from services.audio import normalize_audio, iter_pcm_chunks, voiced_segments
+from services.keywords import KeywordIndex
+from services.ner import create_ner_service
+from services.registry import registry
+from services.streaming_asr import SessionManager
 
 # Configure logging for debugging
 logging.basicConfig(level=logging.INFO)
@@ -15,60 +19,60 @@ logger = logging.getLogger(__name__)
 
 nlp_bp = Blueprint("nlp_bp", __name__)
 
-# Set up the uploads folder (relative to this file)
-UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), "..", "uploads")
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
-# Determine the model path.
-model_path = os.environ.get("VOSK_MODEL_PATH", os.path.join(os.path.dirname(__file__), "..", "vosk-model-small-en-us-0.15"))
-if not os.path.exists(model_path):
-    raise FileNotFoundError(
-        f"Model folder not found at {model_path}. Download a Vosk model and place it at this location, "
-        "or set VOSK_MODEL_PATH to an absolute path."
-    )
+# Emergency-type, severity and place-name dictionaries (reloadable at runtime), built on first use
+keyword_index = None
 
-# Try to load the Vosk model
-try:
-    vosk_model = VoskModel(model_path)
-except Exception as e:
-    raise Exception(f"Failed to create a Vosk model from {model_path}: {e}")
+# Live transcription sessions (POST /api/nlp/stream)
+stream_sessions = None
 
-# Create a Hugging Face NER pipeline with grouped entities, explicitly using CPU.
-ner_pipeline = pipeline("ner", grouped_entities=True, device=-1)
+# Process pool for parallel transcription of long recordings, created on first use
+transcription_pool = None
+_pool_lock = threading.Lock()
 
-def convert_to_wav(audio_path: str) -> str:
-    """
-    Convert the provided audio file to WAV format using pydub.
-    """
-    wav_path = audio_path.rsplit(".", 1)[0] + ".wav"
-    audio = AudioSegment.from_file(audio_path)
-    audio.export(wav_path, format="wav")
-    return wav_path
+# The Vosk model of a transcription pool worker process (see init_transcription_worker)
+_worker_model = None
+
+def load_vosk_model():
+    """Load the Vosk speech model from VOSK_MODEL_PATH (or the bundled small English model)"""
+    model_path = os.environ.get("VOSK_MODEL_PATH", os.path.join(os.path.dirname(__file__), "..", "vosk-model-small-en-us-0.15"))
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(
+            f"Model folder not found at {model_path}. Download a Vosk model and place it at this location, "
+            "or set VOSK_MODEL_PATH to an absolute path."
+        )
 
-def transcribe_audio(audio_path: str) -> str:
-    """
-    Transcribe the given audio file using Vosk.
-    Converts the file to WAV format if needed.
-    """
-    # Convert to WAV format
-    wav_path = convert_to_wav(audio_path)
-    logger.info(f"Converted audio to WAV: {wav_path}")
-    
     try:
-        wf = wave.open(wav_path, "rb")
+        return VoskModel(model_path)
     except Exception as e:
-        logger.error("Error opening WAV file: %s", e)
-        os.remove(wav_path)
-        raise
+        raise Exception(f"Failed to create a Vosk model from {model_path}: {e}")
+
+def load_ner_service():
+    """Create the batched, cached NER service on CPU (backend chosen by NER_BACKEND)."""
+    return create_ner_service(current_app.config)
 
-    rec = KaldiRecognizer(vosk_model, wf.getframerate())
+# Models are loaded lazily or in the background by the registry (see MODEL_LOADING)
+registry.register("vosk", load_vosk_model)
+registry.register("ner", load_ner_service)
+
+def get_keyword_index():
+    """Create (once) and return the keyword index from the configured dictionary files"""
+    global keyword_index
+    if keyword_index is None:
+        config = current_app.config
+        keyword_index = KeywordIndex(
+            config["EMERGENCY_KEYWORDS_PATH"], config["SEVERITY_KEYWORDS_PATH"], config["GAZETTEER_PATH"]
+        )
+    return keyword_index
+
+def transcribe_pcm(pcm: bytes, sample_rate: int, frame_width: int = 2, model=None) -> str:
+    """
+    Transcribe raw PCM audio held in memory using Vosk (the registry's model
+    unless `model` is given).
+    """
+    rec = KaldiRecognizer(model if model is not None else registry.get("vosk"), sample_rate)
     results = []
 
-    while True:
-        data = wf.readframes(4000)
-        if len(data) == 0:
-            break
+    for data in iter_pcm_chunks(pcm, frame_width):
         if rec.AcceptWaveform(data):
             res = rec.Result()
             if res.strip():
@@ -96,41 +100,113 @@ def transcribe_audio(audio_path: str) -> str:
         except json.JSONDecodeError as e:
             logger.error("JSONDecodeError for final result: %s; Error: %s", final_res, e)
 
-    wf.close()
-    os.remove(wav_path)
-    
     full_text = " ".join(results).strip()
     logger.info("Full transcription: %s", full_text)
     return full_text
 
+def init_transcription_worker():
+    """Pool worker initializer: load the Vosk model once per worker process"""
+    global _worker_model
+    _worker_model = load_vosk_model()
+
+def transcribe_in_worker(pcm: bytes, sample_rate: int) -> str:
+    return transcribe_pcm(pcm, sample_rate, model=_worker_model)
+
+def get_transcription_pool():
+    """
+    Create (once) and return the transcription process pool of
+    NLP_PARALLEL_WORKERS processes. They are started with forkserver (or
+    spawn), never by forking this multithreaded web process, and each loads
+    its own Vosk model once when it starts.
+    """
+    global transcription_pool
+    with _pool_lock:
+        if transcription_pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            transcription_pool = ProcessPoolExecutor(
+                max_workers=current_app.config["NLP_PARALLEL_WORKERS"],
+                mp_context=multiprocessing.get_context(method),
+                initializer=init_transcription_worker,
+            )
+    return transcription_pool
+
+def transcribe_parallel(pcm: bytes, sample_rate: int) -> str:
+    """
+    Split 16-bit mono PCM on silence, transcribe the voiced segments in
+    parallel (one recognizer per segment) and join the transcripts in order.
+    Silent stretches are never decoded.
+    """
+    config = current_app.config
+    segments = voiced_segments(
+        pcm, sample_rate,
+        silence_dbfs=config["NLP_VAD_SILENCE_DBFS"],
+        min_silence_ms=config["NLP_VAD_MIN_SILENCE_MS"],
+        max_segment_seconds=config["NLP_PARALLEL_SEGMENT_SECONDS"],
+    )
+    voiced_bytes = sum(end - start for start, end in segments)
+    logger.info(f"Parallel transcription: {len(segments)} segments, {voiced_bytes / max(len(pcm), 1):.0%} voiced")
+
+    pool = get_transcription_pool()
+    futures = [pool.submit(transcribe_in_worker, pcm[start:end], sample_rate) for start, end in segments]
+    return " ".join(text for text in (f.result() for f in futures) if text).strip()
+
+def prepare_audio(data: bytes):
+    """Normalize an upload to 16 kHz mono 16-bit PCM (see services.audio.normalize_audio)"""
+    config = current_app.config
+    pcm, report = normalize_audio(
+        data, sample_rate=config["NLP_SAMPLE_RATE"], trim_dbfs=config["NLP_TRIM_SILENCE_DBFS"]
+    )
+    logger.info(
+        f"Normalized audio: {report['source_sample_rate']} Hz x{report['source_channels']} -> "
+        f"{report['sample_rate']} Hz mono, {report['duration_seconds']}s, "
+        f"{report['bytes_removed']} bytes removed"
+    )
+    return pcm, report
+
+def transcribe_normalized(pcm: bytes, parallel=None) -> str:
+    """
+    Transcribe normalized PCM. Recordings of at least NLP_PARALLEL_MIN_SECONDS
+    (or any recording when parallel=True) are split on silence and
+    transcribed in parallel.
+    """
+    config = current_app.config
+    sample_rate, workers = config["NLP_SAMPLE_RATE"], config["NLP_PARALLEL_WORKERS"]
+    seconds = len(pcm) / (sample_rate * 2)
+    if parallel is None:
+        parallel = workers > 0 and seconds >= config["NLP_PARALLEL_MIN_SECONDS"]
+    if parallel and workers > 0:
+        return transcribe_parallel(pcm, sample_rate)
+    return transcribe_pcm(pcm, sample_rate)
+
+def transcribe_audio(data: bytes, parallel=None) -> str:
+    """
+    Transcribe an uploaded recording using Vosk.
+    The upload is decoded to PCM in memory; nothing touches the disk.
+    """
+    pcm, _ = prepare_audio(data)
+    return transcribe_normalized(pcm, parallel=parallel)
+
 def extract_details(text: str) -> dict:
     """
     Extract location, emergency type, and severity from the transcribed text
-    using a Hugging Face Transformers NER pipeline and simple keyword matching.
+    using a Hugging Face Transformers NER pipeline and the compiled keyword
+    and gazetteer matchers.
     """
-    ner_results = ner_pipeline(text)
+    ner_results = registry.get("ner")(text)
     locations = [
         entity["word"]
         for entity in ner_results
         if entity["entity_group"] in ["LOC", "GPE"]
     ]
-    
-    emergency_keywords = ["accident", "fire", "injury", "heart attack", "crash", "earthquake", "flood"]
-    severity_keywords = {"minor": "low", "serious": "medium", "critical": "high", "severe": "high"}
-    
-    emergency_type = None
-    severity = "Unknown"
-    text_lower = text.lower()
-    
-    for keyword in emergency_keywords:
-        if keyword in text_lower:
-            emergency_type = keyword
-            break
 
-    for key, level in severity_keywords.items():
-        if key in text_lower:
-            severity = level
-            break
+    # Known local places (streets, landmarks, wards) the NER model may miss
+    keywords = get_keyword_index()
+    for place in keywords.places(text):
+        if place not in locations:
+            locations.append(place)
+
+    emergency_type = keywords.emergency_type(text)
+    severity = keywords.severity(text) or "Unknown"
 
     if not locations:
         location_match = re.search(r"(?:in|at) ([A-Z][a-z]+(?: [A-Z][a-z]+)*)", text)
@@ -143,6 +219,30 @@ def extract_details(text: str) -> dict:
         "severity": severity
     }
 
+@nlp_bp.route("/nlp/keywords/reload", methods=["POST"])
+def reload_keywords():
+    """Rebuild the emergency, severity and gazetteer matchers from their files"""
+    try:
+        sizes = get_keyword_index().reload()
+    except Exception as e:
+        logger.error(f"Error reloading keyword dictionaries: {e}")
+        return jsonify({"error": "Failed to reload keywords", "details": str(e)}), 500
+    return jsonify({"message": "Keywords reloaded", "terms": sizes}), 200
+
+def analyze_audio(data: bytes, parallel=None, checkpoint=None) -> dict:
+    """
+    Transcribe an uploaded recording and extract the emergency details from
+    it. `checkpoint()`, if given, is called between stages.
+    """
+    pcm, report = prepare_audio(data)
+    if checkpoint is not None:
+        checkpoint()
+    text = transcribe_normalized(pcm, parallel=parallel)
+    if checkpoint is not None:
+        checkpoint()
+    details = extract_details(text)
+    return {"transcription": text, "details": details, "audio": report}
+
 @nlp_bp.route("/nlp", methods=["POST"])
 def analyze():
     if "audio" not in request.files:
@@ -152,29 +252,108 @@ def analyze():
     if audio_file.filename == "":
         return jsonify({"error": "No selected file"}), 400
 
-    filename = secure_filename(audio_file.filename)
-    file_path = os.path.join(UPLOAD_FOLDER, filename)
-    audio_file.save(file_path)
-    logger.info(f"Saved audio file to: {file_path}")
+    data = audio_file.read()
+    logger.info(f"Received audio upload: {audio_file.filename} ({len(data)} bytes)")
+
+    # ?mode=parallel / ?mode=sequential override the length-based choice
+    mode = request.args.get("mode")
+    parallel = {"parallel": True, "sequential": False}.get(mode)
 
     try:
-        text = transcribe_audio(file_path)
-        details = extract_details(text)
-        
-        # Ensure file cleanup
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
-        response = {"transcription": text, "details": details}
+        response = analyze_audio(data, parallel=parallel)
         logger.info(f"Response: {response}")
         return jsonify(response), 200
     
     except Exception as e:
         logger.error(f"Error analyzing audio: {e}")
-        
-        # Ensure file cleanup
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
+@nlp_bp.route("/nlp/stats", methods=["GET"])
+def nlp_stats():
+    """Report NER batching/cache statistics and the number of live transcription sessions"""
+    return jsonify({
+        "ner": registry.get("ner").stats() if registry.ready("ner") else None,
+        "streamSessions": stream_sessions.count() if stream_sessions is not None else 0,
+    }), 200
+
+def get_stream_sessions():
+    """Create (once) and return the live transcription session manager"""
+    global stream_sessions
+    if stream_sessions is None:
+        stream_sessions = SessionManager(
+            idle_timeout=current_app.config.get("NLP_STREAM_IDLE_TIMEOUT", 120),
+            max_sessions=current_app.config.get("NLP_STREAM_MAX_SESSIONS", 100),
+        )
+    return stream_sessions
+
+@nlp_bp.route("/nlp/stream", methods=["POST"])
+def start_stream():
+    """
+    Open a live transcription session. Audio is then sent to
+    POST /api/nlp/stream/<session_id> as raw 16-bit little-endian mono PCM at
+    `sample_rate` Hz (query parameter or JSON field, default 16000).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        sample_rate = int(request.args.get("sample_rate", data.get("sample_rate", 16000)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "sample_rate must be an integer"}), 400
+    if sample_rate <= 0:
+        return jsonify({"error": "sample_rate must be positive"}), 400
+
+    try:
+        # The registry logs the load failure and reports it under /api/health
+        model = registry.get("vosk")
+    except Exception as e:
+        return jsonify({"error": f"Speech model unavailable: {e}"}), 503, {"Retry-After": "30"}
+    try:
+        session = get_stream_sessions().create(model, sample_rate, extract_details)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({"sessionId": session.id, "sampleRate": sample_rate}), 201
+
+@nlp_bp.route("/nlp/stream/<session_id>", methods=["POST"])
+def feed_stream(session_id):
+    """
+    Feed audio into a live session. The body may be a single chunk or a long
+    chunked upload; it is consumed as it arrives and NDJSON events are
+    streamed back as they happen:
+      {"partial": "..."}                               in-progress hypothesis
+      {"final": {"index", "text", "details"}}          finalized utterance with extract_details()
+    """
+    session = get_stream_sessions().get(session_id)
+    if session is None:
+        return jsonify({"error": "Session not found or expired"}), 404
+
+    read_size = current_app.config.get("NLP_STREAM_READ_BYTES", 8000)
+    stream = request.stream
+
+    def generate():
+        pending = b""
+        while True:
+            chunk = stream.read(read_size)
+            if not chunk:
+                break
+            # Only whole 16-bit samples go to the recognizer
+            pending += chunk
+            usable = len(pending) - len(pending) % 2
+            data, pending = pending[:usable], pending[usable:]
+            for event in session.feed(data):
+                yield json.dumps(event) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson",
+                    headers={"X-Accel-Buffering": "no"})
+
+@nlp_bp.route("/nlp/stream/<session_id>", methods=["DELETE"])
+def end_stream(session_id):
+    """Close a live session, flushing the last utterance and returning the full transcript"""
+    session = get_stream_sessions().close(session_id)
+    if session is None:
+        return jsonify({"error": "Session not found or expired"}), 404
+
+    utterance, transcript = session.finish()
+    return jsonify({
+        "final": utterance,
+        "transcription": transcript,
+        "utterances": session.utterances,
+    }), 200
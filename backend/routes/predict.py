@@ -1,108 +1,500 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, url_for, stream_with_context
 import os
+import json
+import math
+import uuid
+import tempfile
+import logging
+import threading
+from collections import OrderedDict, deque
 import cv2  # type: ignore
 import numpy as np  # type: ignore
 import base64
-from ultralytics import YOLO  # type: ignore
 import io
+from services.batching import MicroBatcher
+from services.detector import detector, extract_detections
+from services.metrics import metrics
+from services.worker_pool import worker_pool, WorkersUnavailable
+from services.result_cache import ResultCache, content_hash, dhash
+from services.preprocess import decode_for_inference, tile_windows, offset_detections, merge_detections
+from services.video import FrameSampler, iter_video_frames, iter_mjpeg_frames
+
+logger = logging.getLogger(__name__)
 
 predict_bp = Blueprint("predict", __name__, url_prefix="/api/predict")
 
-# Global model variable
-model = None
+# Global batch scheduler and result cache
+batcher = None
+result_cache = None
+
+# Recent uploads kept (encoded) so the annotated image can be rendered on demand
+rendered_results = OrderedDict()
+rendered_results_lock = threading.Lock()
+
+RAW_IMAGE_MIMETYPES = ("application/octet-stream",)
 
 def get_model():
-    """Load and return the YOLO model"""
-    global model
-    if model is None:
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        model_path = os.path.join(base_dir, "ResqBridgeAccidentDetection.onnx")
-        if not os.path.exists(model_path):
-            model_path = os.path.join(base_dir, "best.pt")  # Fallback model
-        model = YOLO(model_path)
-    return model
+    """Return the warmed-up YOLO model (see services.detector)"""
+    return detector.get()
+
+def infer_batch(images):
+    """
+    Run a list of images through the YOLO model in one forward pass and return
+    the detections of each image.
+    Models exported with a fixed batch size of 1 reject larger batches, in which
+    case the images are run one after another instead.
+    """
+    model_instance = get_model()
+    try:
+        results = list(model_instance(images, imgsz=detector.imgsz, conf=0.25, save=False, verbose=False))
+    except Exception:
+        if len(images) == 1:
+            raise
+        logger.warning("Batched inference failed for %d images, running them one by one", len(images), exc_info=True)
+        results = [model_instance(img, imgsz=detector.imgsz, conf=0.25, save=False, verbose=False)[0] for img in images]
+    return [extract_detections(result) for result in results]
+
+def get_batcher():
+    """Create (once) and return the micro-batching inference scheduler"""
+    global batcher
+    if batcher is None:
+        batcher = MicroBatcher(
+            infer_batch,
+            max_batch_size=current_app.config.get("PREDICT_MAX_BATCH_SIZE", 8),
+            max_wait_ms=current_app.config.get("PREDICT_MAX_WAIT_MS", 10),
+            name="predict-batcher",
+        )
+    return batcher
+
+def get_inference_backend():
+    """
+    Return the object inference requests are submitted to: the process pool
+    when PREDICT_WORKERS > 0, otherwise the in-process micro-batcher. Both
+    expose submit(img) -> Future resolving to the image's detections.
+    """
+    if worker_pool.started:
+        return worker_pool
+    return get_batcher()
+
+def workers_unavailable():
+    """A 503 response while the worker pool is on but none of its workers is ready, else None"""
+    if worker_pool.started and not worker_pool.status()["ready"]:
+        return jsonify({"error": "No inference worker is ready"}), 503, {"Retry-After": "5"}
+    return None
+
+@predict_bp.route("/ready", methods=["GET"])
+def predict_ready():
+    """Readiness probe: 200 once the detector is loaded and warmed up, 503 before"""
+    status = worker_pool.status() if worker_pool.started else detector.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+@predict_bp.route("/metrics", methods=["GET", "DELETE"])
+def predict_metrics():
+    """
+    Per-stage latency histograms of /api/predict (read_body, base64_decode,
+    cache_lookup, image_decode, inference, annotate, jpeg_encode,
+    base64_encode, total). JSON by default, Prometheus text with
+    ?format=prometheus. DELETE resets them, e.g. between benchmark runs.
+    """
+    if request.method == "DELETE":
+        metrics.reset("predict.")
+        return jsonify({"message": "Metrics reset"}), 200
+    if request.args.get("format") == "prometheus":
+        return Response(metrics.prometheus("predict."), mimetype="text/plain; version=0.0.4")
+    return jsonify(metrics.snapshot("predict.")), 200
+
+def get_result_cache():
+    """Create (once) and return the duplicate-image result cache"""
+    global result_cache
+    if result_cache is None:
+        result_cache = ResultCache(
+            max_size=current_app.config.get("PREDICT_CACHE_SIZE", 512),
+            ttl_seconds=current_app.config.get("PREDICT_CACHE_TTL", 600),
+            max_distance=current_app.config.get("PREDICT_CACHE_MAX_DISTANCE", 4),
+        )
+    return result_cache
+
+@predict_bp.route("/stats", methods=["GET"])
+def predict_stats():
+    """Report inference scheduler and result cache statistics"""
+    return jsonify({
+        "batcher": batcher.stats() if batcher is not None else None,
+        "workers": worker_pool.status() if worker_pool.started else None,
+        "cache": result_cache.stats() if result_cache is not None else None,
+    }), 200
+
+def parse_flag(value) -> bool:
+    """Interpret a query/form/JSON value such as "1", "true" or True as a boolean flag"""
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+def read_image_request():
+    """
+    Extract the raw image bytes and request options from the current request.
+
+    Accepted inputs, in order of preference:
+      - multipart/form-data with the image in the "image" file field
+      - the raw image bytes as the request body (Content-Type image/* or application/octet-stream)
+      - JSON with a base64 encoded image (optionally a data URL) in "image"
+
+    Returns a tuple (image_bytes, options) where image_bytes is None if no image was sent.
+    """
+    options = request.args.to_dict()
+
+    if "image" in request.files:
+        options.update(request.form.to_dict())
+        with metrics.timer("predict.read_body"):
+            return request.files["image"].read() or None, options
+
+    mimetype = request.mimetype or ""
+    if mimetype.startswith("image/") or mimetype in RAW_IMAGE_MIMETYPES:
+        with metrics.timer("predict.read_body"):
+            return request.get_data() or None, options
+
+    with metrics.timer("predict.read_body"):
+        data = request.get_json(silent=True) or {}
+    options.update({key: value for key, value in data.items() if key != "image"})
+    image_data = data.get("image")
+    if not image_data:
+        return None, options
+
+    # Remove data URL header if present
+    if "," in image_data:
+        image_data = image_data.split(",")[1]
+    with metrics.timer("predict.base64_decode"):
+        return base64.b64decode(image_data), options
+
+def decode_image(image_bytes):
+    """Decode encoded image bytes into a BGR array, or None if they are not an image"""
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+def summarize_detections(detections):
+    """Pick the most relevant detection (highest confidence) and derive the severity from it"""
+    detection = max(detections, key=lambda d: d["confidence"], default=None)
+
+    # Determine severity based on confidence
+    severity = "Low"  # Default severity level
+    if detection and detection["confidence"] > 0.6:
+        severity = "Moderate"
+    if detection and detection["confidence"] > 0.8:
+        severity = "High"
+    return detection, severity
+
+def rescale_detections(detections, from_shape, to_shape):
+    """Scale box coordinates computed on an image of `from_shape` onto one of `to_shape`"""
+    if tuple(from_shape[:2]) == tuple(to_shape[:2]):
+        return detections
+    sy = to_shape[0] / from_shape[0]
+    sx = to_shape[1] / from_shape[1]
+    return [
+        {
+            **det,
+            "coordinates": [det["coordinates"][0] * sx, det["coordinates"][1] * sy,
+                            det["coordinates"][2] * sx, det["coordinates"][3] * sy]
+            if det.get("coordinates") else det.get("coordinates"),
+        }
+        for det in detections
+    ]
+
+def decode_working_image(image_bytes):
+    """
+    Decode an upload at the resolution the model works at.
+    Returns (img, full_shape); see services.preprocess.decode_for_inference.
+    """
+    return decode_for_inference(
+        image_bytes, detector.imgsz, reduced=current_app.config.get("PREDICT_REDUCED_DECODE", True)
+    )
+
+def detect_tiled(img):
+    """
+    Tiled inference for very large images: overlapping model-sized tiles plus
+    one downscaled pass over the whole image (for objects larger than a tile)
+    are submitted together, then merged with non-maximum suppression.
+    """
+    config = current_app.config
+    tile_size = config.get("PREDICT_TILE_SIZE") or detector.imgsz
+    backend = get_inference_backend()
+    height, width = img.shape[:2]
+
+    jobs = [
+        (x0, y0, 1.0, backend.submit(img[y0:y1, x0:x1]))
+        for x0, y0, x1, y1 in tile_windows(height, width, tile_size, config.get("PREDICT_TILE_OVERLAP", 0.2))
+    ]
+    scale = max(height, width) / tile_size
+    if scale > 1:
+        overview = cv2.resize(img, (round(width / scale), round(height / scale)), interpolation=cv2.INTER_AREA)
+        jobs.append((0, 0, scale, backend.submit(overview)))
+
+    detections = []
+    for dx, dy, job_scale, future in jobs:
+        detections.extend(offset_detections(future.result(), dx, dy, job_scale))
+    return merge_detections(detections, config.get("PREDICT_TILE_NMS_IOU", 0.5))
+
+def detect(image_bytes, tiled=False):
+    """
+    Run accident detection on encoded image bytes, answering identical and
+    near-duplicate uploads from the result cache.
+
+    Returns a tuple (img, detections, full_shape). Detection coordinates refer
+    to the full-resolution image of (height, width) full_shape, while img is
+    the decoded working-resolution image, or None when the result came from
+    an exact cache hit and no decode was needed.
+    Raises ValueError if the bytes cannot be decoded as an image.
+    """
+    cache = get_result_cache()
+    with metrics.timer("predict.cache_lookup"):
+        mode = "tiled" if tiled else "full"
+        key = f"{content_hash(image_bytes)}:{mode}"
+        cached = cache.get_exact(key)
+    if cached is not None:
+        shape, detections = cached
+        return None, detections, shape
+
+    with metrics.timer("predict.image_decode"):
+        if tiled:
+            img = decode_image(image_bytes)
+            full_shape = img.shape[:2] if img is not None else None
+        else:
+            img, full_shape = decode_working_image(image_bytes)
+    if img is None:
+        raise ValueError("Invalid image data")
+
+    with metrics.timer("predict.cache_lookup"):
+        phash = dhash(img)
+        cached = cache.get_similar(phash, mode)
+    if cached is not None:
+        shape, detections = cached
+        return img, rescale_detections(detections, shape, full_shape), full_shape
+
+    min_tile_side = current_app.config.get("PREDICT_TILE_MIN_SIDE", 2000)
+    with metrics.timer("predict.inference"):
+        if tiled and max(full_shape) >= min_tile_side:
+            detections = detect_tiled(img)
+        else:
+            # Process the image using YOLO model; concurrent requests share one forward pass
+            # (or are spread over the worker processes)
+            detections = get_inference_backend().submit(img).result()
+            detections = rescale_detections(detections, img.shape, full_shape)
+    cache.put(key, phash, full_shape, detections, mode)
+    return img, detections, full_shape
+
+def annotate_image(img, detections):
+    """Draw the detection boxes and labels onto a copy of the image"""
+    annotated = img.copy()
+    thickness = max(2, round(sum(img.shape[:2]) / 2 * 0.003))
+    for det in detections:
+        if not det.get("coordinates"):
+            continue
+        x1, y1, x2, y2 = (int(round(v)) for v in det["coordinates"])
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 0, 255), thickness, cv2.LINE_AA)
+        label = f"{det['class']} {det['confidence']:.2f}"
+        (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, thickness / 3, max(1, thickness - 1))
+        top = max(y1 - h - 6, 0)
+        cv2.rectangle(annotated, (x1, top), (x1 + w + 4, top + h + 6), (0, 0, 255), -1, cv2.LINE_AA)
+        cv2.putText(annotated, label, (x1 + 2, top + h + 2), cv2.FONT_HERSHEY_SIMPLEX,
+                    thickness / 3, (255, 255, 255), max(1, thickness - 1), cv2.LINE_AA)
+    return annotated
+
+def encode_jpeg(img):
+    """Encode a BGR image as JPEG bytes, or None on failure"""
+    success, buffer = cv2.imencode(".jpg", img)
+    return buffer.tobytes() if success else None
+
+def render_annotated(image_bytes, detections, full_shape, img=None):
+    """Annotate the working-resolution image with full-resolution detections and encode it as JPEG"""
+    if img is None:
+        with metrics.timer("predict.image_decode"):
+            img, _ = decode_working_image(image_bytes)
+        if img is None:
+            return None
+    with metrics.timer("predict.annotate"):
+        annotated = annotate_image(img, rescale_detections(detections, full_shape, img.shape))
+    with metrics.timer("predict.jpeg_encode"):
+        return encode_jpeg(annotated)
+
+def remember_result(image_bytes, detections, full_shape) -> str:
+    """Keep the encoded upload and its detections so the annotated image can be rendered later"""
+    result_id = uuid.uuid4().hex
+    limit = current_app.config.get("PREDICT_RENDER_CACHE_SIZE", 64)
+    with rendered_results_lock:
+        rendered_results[result_id] = (image_bytes, detections, full_shape)
+        while len(rendered_results) > limit:
+            rendered_results.popitem(last=False)
+    return result_id
 
 @predict_bp.route("", methods=["POST"])
 def predict():
+    with metrics.timer("predict.total"):
+        return run_predict()
+
+def build_prediction(image_bytes, options, checkpoint=None):
+    """
+    Detect accidents in encoded image bytes and build the /api/predict
+    response body (without the request-specific annotatedImageUrl).
+    Raises ValueError for undecodable images and RuntimeError if the
+    annotated image cannot be encoded. `checkpoint()`, if given, is called
+    between stages (queued jobs use it to stop once cancelled).
+    """
+    boxes_only = parse_flag(options.get("boxes_only"))
+    tiled = parse_flag(options.get("tiled"))
+
+    img, detections, full_shape = detect(image_bytes, tiled=tiled)
+    detection, severity = summarize_detections(detections)
+    if checkpoint is not None:
+        checkpoint()
+
+    result_id = remember_result(image_bytes, detections, full_shape)
+    response_data = {
+        "success": True,
+        "accidentDetected": bool(detection),
+        "detection": {
+            **(detection or {}),
+            "severity": severity
+        },
+        "detections": detections,
+        "resultId": result_id,
+    }
+
+    # In boxes-only mode skip drawing and encoding the annotated image entirely
+    if not boxes_only:
+        buffer = render_annotated(image_bytes, detections, full_shape, img)
+        if buffer is None:
+            raise RuntimeError("Failed to encode annotated image")
+        with metrics.timer("predict.base64_encode"):
+            result_base64 = base64.b64encode(buffer).decode("utf-8")
+        response_data["processedImage"] = f"data:image/jpeg;base64,{result_base64}"
+    return response_data
+
+def run_predict():
     try:
-        # Retrieve image data from the request JSON
-        data = request.get_json() or {}
-        image_data = data.get("image")
-        if not image_data:
+        image_bytes, options = read_image_request()
+        if not image_bytes:
             return jsonify({"error": "No image data provided"}), 400
 
-        # Remove data URL header if present
-        if "," in image_data:
-            image_data = image_data.split(",")[1]
-        
-        # Decode base64 image data
-        image_bytes = base64.b64decode(image_data)
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if img is None:
-            return jsonify({"error": "Invalid image data"}), 400
-
-        # Process the image using YOLO model
-        model_instance = get_model()
-        results = model_instance(img, conf=0.25, save=False, verbose=False)
-
-        # Extract the most relevant detection (with highest confidence)
-        detection = None
-        max_confidence = 0.0
-        severity = "Low"  # Default severity level
-
-        # Process the first result (assuming one image is passed)
-        for result in results:
-            if hasattr(result.boxes, "conf") and len(result.boxes.conf) > 0:
-                confs = result.boxes.conf.tolist()
-                coords = result.boxes.xyxy.tolist() if hasattr(result.boxes, "xyxy") else []
-                classes = result.boxes.cls.tolist() if hasattr(result.boxes, "cls") else []
-                names = [result.names[int(cls)] for cls in classes] if hasattr(result, "names") else []
-
-                for i, conf in enumerate(confs):
-                    if conf > max_confidence:
-                        max_confidence = conf
-                        detection = {
-                            "class": names[i] if i < len(names) else "unknown",
-                            "confidence": conf,
-                            "coordinates": coords[i] if i < len(coords) else None,
-                        }
-
-                        # Determine severity based on confidence
-                        if conf > 0.6:
-                            severity = "Moderate"
-                        if conf > 0.8:
-                            severity = "High"
-            break  # process only the first result
-
-        # Get annotated image from results (using the first result)
-        annotated_img = None
-        for r in results:
-            annotated_img = r.plot()  # returns image in RGB format with annotations
-            break
-
-        if annotated_img is None:
-            annotated_img = img  # fallback if no annotations
-
-        # Convert annotated image from RGB to BGR for encoding
-        annotated_img = cv2.cvtColor(annotated_img, cv2.COLOR_RGB2BGR)
-        success, buffer = cv2.imencode(".jpg", annotated_img)
-        if not success:
-            return jsonify({"error": "Failed to encode annotated image"}), 500
-        result_base64 = base64.b64encode(buffer).decode("utf-8")
-
-        response_data = {
-            "success": True,
-            "accidentDetected": bool(detection),
-            "detection": {
-                **(detection or {}),
-                "severity": severity
-            },
-            "processedImage": f"data:image/jpeg;base64,{result_base64}"
-        }
+        try:
+            response_data = build_prediction(image_bytes, options)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except WorkersUnavailable as e:
+            return jsonify({"error": str(e)}), 503, {"Retry-After": "5"}
+        response_data["annotatedImageUrl"] = url_for("predict.annotated_image", result_id=response_data["resultId"])
         return jsonify(response_data), 200
 
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
+
+@predict_bp.route("/<result_id>/image", methods=["GET"])
+def annotated_image(result_id):
+    """
+    Render the annotated JPEG for an earlier prediction on demand.
+    Only the most recent PREDICT_RENDER_CACHE_SIZE results are kept.
+    """
+    with rendered_results_lock:
+        entry = rendered_results.get(result_id)
+        if entry is not None:
+            rendered_results.move_to_end(result_id)
+    if entry is None:
+        return jsonify({"error": "Result not found or expired"}), 404
+
+    buffer = render_annotated(*entry)
+    if buffer is None:
+        return jsonify({"error": "Failed to encode annotated image"}), 500
+    return Response(buffer, mimetype="image/jpeg")
+
+def format_stream_event(payload, sse):
+    """Serialize one stream event as a Server-Sent Event or an NDJSON line"""
+    data = json.dumps(payload)
+    if sse:
+        event = "summary" if payload.get("done") else "detection"
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+@predict_bp.route("/stream", methods=["POST"])
+def predict_stream():
+    """
+    Run accident detection over a video while it is being processed.
+
+    Accepts either a video file in the multipart "video" field or a chunked
+    MJPEG body (multipart/x-mixed-replace or concatenated JPEG frames).
+    Frames are decoded incrementally, sampled at an adaptive rate and
+    near-identical frames are skipped. One event per analyzed frame is
+    streamed back as NDJSON, or as Server-Sent Events when the client sends
+    Accept: text/event-stream or ?format=sse; a final summary event closes
+    the stream.
+    """
+    config = current_app.config
+    sse = request.args.get("format") == "sse" or request.accept_mimetypes.best == "text/event-stream"
+    try:
+        sample_fps = float(request.args.get("sample_fps", config.get("PREDICT_STREAM_SAMPLE_FPS", 2)))
+    except (TypeError, ValueError):
+        sample_fps = float("nan")
+    if not math.isfinite(sample_fps) or sample_fps <= 0:
+        return jsonify({"error": "sample_fps must be a positive number"}), 400
+    sampler = FrameSampler(
+        sample_fps=sample_fps,
+        max_interval=config.get("PREDICT_STREAM_MAX_INTERVAL", 2),
+        diff_threshold=config.get("PREDICT_STREAM_DIFF_THRESHOLD", 4.0),
+    )
+    max_inflight = max(1, config.get("PREDICT_STREAM_MAX_INFLIGHT", 4))
+    unavailable = workers_unavailable()
+    if unavailable is not None:
+        return unavailable
+    backend = get_inference_backend()
+
+    video_path = None
+    if "video" in request.files:
+        # OpenCV needs a path; copy the upload to a temp file in chunks
+        fd, video_path = tempfile.mkstemp(suffix=os.path.splitext(request.files["video"].filename or "")[1])
+        with os.fdopen(fd, "wb") as out:
+            request.files["video"].save(out)
+        frames = iter_video_frames(video_path, sampler)
+    elif (request.mimetype or "").startswith(("multipart/x-mixed-replace", "image/", "video/x-motion-jpeg")) \
+            or request.mimetype in RAW_IMAGE_MIMETYPES:
+        frames = iter_mjpeg_frames(
+            request.stream, sampler,
+            max_frame_bytes=config.get("PREDICT_STREAM_MAX_FRAME_BYTES", 8 * 1024 * 1024),
+        )
+    else:
+        return jsonify({"error": "No video or MJPEG stream provided"}), 400
+
+    def frame_event(index, timestamp, future):
+        detections = future.result()
+        detection, severity = summarize_detections(detections)
+        return {
+            "frame": index,
+            "timestamp": round(timestamp, 3),
+            "accidentDetected": bool(detection),
+            "detection": {**(detection or {}), "severity": severity},
+            "detections": detections,
+        }
+
+    def generate():
+        # At most max_inflight frames are held while waiting for inference
+        pending = deque()
+        analyzed = 0
+        try:
+            for index, timestamp, frame in frames:
+                pending.append((index, timestamp, backend.submit(frame)))
+                analyzed += 1
+                if len(pending) >= max_inflight:
+                    yield format_stream_event(frame_event(*pending.popleft()), sse)
+            while pending:
+                yield format_stream_event(frame_event(*pending.popleft()), sse)
+            yield format_stream_event({
+                "done": True,
+                "framesAnalyzed": analyzed,
+                "framesSkippedStatic": sampler.skipped_static,
+            }, sse)
+        except Exception as e:
+            logger.exception("Video stream detection failed")
+            yield format_stream_event({"done": True, "error": str(e)}, sse)
+        finally:
+            if video_path and os.path.exists(video_path):
+                os.remove(video_path)
+
+    mimetype = "text/event-stream" if sse else "application/x-ndjson"
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={"X-Accel-Buffering": "no"})
@@ -1,8 +1,16 @@
-from flask import Blueprint, request, jsonify
-from models import db, SOSReport
+from flask import Blueprint, request, jsonify, current_app, send_from_directory, abort
+from sqlalchemy.exc import IntegrityError
+from models import db, SOSReport, StoredMedia
 from datetime import datetime
+from services.media_uploads import MediaUploader, spool_upload
+from services.storage import LocalStorage, create_storage
+from services.pagination import InvalidPage, paginate_request
+from services.geo import coordinates_for, nearest, point_from_args, radius_from_args, within_radius
+from services.events import events
+from services.sync import delta_response, list_etag, not_modified, record_tombstone
+from services.bulk import bulk_insert, created_summary, iter_records, summarize
+from services.search import apply_filters
 import cloudinary
-import cloudinary.uploader
 
 sos_bp = Blueprint("sos", __name__, url_prefix="/api/sos")
 
@@ -14,52 +22,136 @@ cloudinary.config(
     secure=True
 )
 
-def upload_to_cloudinary(file, folder):
-    """Uploads a file to Cloudinary and returns its secure URL."""
-    if file:
-        # Determine resource_type based on the file's content type
-        if file.content_type.startswith('audio/'):
-            resource_type = "auto"  # or specifically "raw" or "video" for audio
-        elif file.content_type.startswith('video/'):
-            resource_type = "video"
-        else:
-            resource_type = "image"
-            
-        response = cloudinary.uploader.upload(
-            file, 
-            folder=folder,
-            resource_type=resource_type
+# Form field -> (storage folder, SOSReport column)
+MEDIA_FIELDS = {
+    "image": ("sos_images", "image_url"),
+    "video": ("sos_videos", "video_url"),
+    "audio": ("sos_audio", "audio_url"),
+}
+
+# Media storage backend, created on first use
+media_storage = None
+
+def get_media_storage():
+    global media_storage
+    if media_storage is None:
+        media_storage = create_storage(current_app.config, find_url=find_stored_media)
+    return media_storage
+
+def find_stored_media(key):
+    """URL recorded for a content key of the configured storage backend, or None"""
+    stored = db.session.get(StoredMedia, (current_app.config.get("MEDIA_STORAGE"), key))
+    return stored.url if stored is not None else None
+
+
+def record_upload(report_id, field, url, digest, content_type=None):
+    """Store the URL of a finished upload on its SOS report and remember it by content hash"""
+    if url is None:
+        return
+    remember_stored_media(MEDIA_FIELDS[field][0], digest, url, content_type)
+    sos = SOSReport.query.get(report_id)
+    if sos is None:  # deleted while uploading
+        return
+    setattr(sos, MEDIA_FIELDS[field][1], url)
+    db.session.commit()
+    events.publish("sos", "update", serialize_sos(sos))
+
+def remember_stored_media(folder, digest, url, content_type=None):
+    """Record stored content in the stored_media table, so later uploads of it are not sent again"""
+    backend = current_app.config.get("MEDIA_STORAGE")
+    key = get_media_storage().make_key(folder, digest)
+    if db.session.get(StoredMedia, (backend, key)) is not None:
+        return
+    try:
+        db.session.add(StoredMedia(backend=backend, key=key, url=url, content_type=content_type))
+        db.session.commit()
+    except IntegrityError:  # recorded by a concurrent upload of the same content
+        db.session.rollback()
+
+def record_uploads_finished(report_id, failed_fields):
+    """Mark the media of an SOS report complete, or failed if any upload gave up"""
+    sos = SOSReport.query.get(report_id)
+    if sos is None:
+        return
+    sos.media_status = "failed" if failed_fields else "complete"
+    db.session.commit()
+    events.publish("sos", "update", serialize_sos(sos))
+
+# Background media uploader, created on first use
+media_uploader = None
+
+def get_media_uploader():
+    global media_uploader
+    if media_uploader is None:
+        app = current_app._get_current_object()
+        media_uploader = MediaUploader(
+            get_media_storage().save,
+            on_uploaded=record_upload,
+            on_finished=record_uploads_finished,
+            workers=app.config.get("SOS_UPLOAD_WORKERS", 4),
+            retries=app.config.get("SOS_UPLOAD_RETRIES", 2),
+            timeout=app.config.get("SOS_UPLOAD_TIMEOUT", 60),
+            wrap=app.app_context,
         )
-        return response["secure_url"]  # Get the uploaded file's URL
-    return None
+    return media_uploader
+
 
+def serialize_sos(report):
+    return {
+        "id": report.id,
+        "title": report.title,
+        "severity": report.severity,
+        "location": report.location,
+        "status": report.status,
+        "reported_at": report.reported_at.isoformat(),
+        "updated_at": report.updated_at.isoformat() if report.updated_at else None,
+        "image_url": report.image_url,
+        "video_url": report.video_url,
+        "audio_url": report.audio_url,
+        "media_status": report.media_status,
+        "latitude": report.latitude,
+        "longitude": report.longitude,
+    }
 
 @sos_bp.route("/", methods=["GET"])
 def get_sos_reports():
     """
-    Retrieve all SOS reports ordered by reported time (most recent first).
-    """
-    sos_reports = SOSReport.query.order_by(SOSReport.reported_at.desc()).all()
-    data = [
-        {
-            "id": report.id,
-            "title": report.title,
-            "severity": report.severity,
-            "location": report.location,
-            "status": report.status,
-            "reported_at": report.reported_at.isoformat(),
-            "image_url": report.image_url,
-            "video_url": report.video_url,
-            "audio_url": report.audio_url,
-        }
-        for report in sos_reports
-    ]
-    return jsonify(data), 200
+    Retrieve SOS reports ordered by reported time (most recent first), one
+    page at a time: ?limit= and ?cursor=; ?all=true returns every report.
+    Filters: ?status=, ?from= / ?to= on reported_at and ?q= over the title.
+    ?since=<timestamp> returns only the changes since then (see incidents).
+    """
+    etag = list_etag(SOSReport, SOSReport.updated_at, "sos", request.args)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    try:
+        query = apply_filters(db.session, SOSReport.query, SOSReport, request.args, SOSReport.reported_at)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if request.args.get("since"):
+        return delta_response(query, SOSReport.updated_at, "sos", serialize_sos, etag)
+
+    try:
+        sos_reports, headers = paginate_request(
+            query,
+            [(SOSReport.reported_at, True), (SOSReport.id, True)],
+            request.args,
+            request.base_url,
+            current_app.config.get("PAGE_SIZE", 50),
+            current_app.config.get("MAX_PAGE_SIZE", 500),
+        )
+    except InvalidPage as e:
+        return jsonify({"error": str(e)}), 400
+    data = [serialize_sos(report) for report in sos_reports]
+    return jsonify(data), 200, {**headers, "ETag": f'W/"{etag}"'}
 
 @sos_bp.route("/", methods=["POST"])
 def send_sos():
     """
     Create a new SOS alert with optional media uploads (image, video, audio).
+    The report is saved and acknowledged at once with media_status "pending";
+    the media are uploaded concurrently in the background.
     """
     user_id = request.form.get("user_id")
     severity = request.form.get("severity")
@@ -69,33 +161,39 @@ def send_sos():
     if not user_id or not severity or not location:
         return jsonify({"error": "user_id, severity, and location are required"}), 400
     
-    # Handle file uploads
-    image_url = None
-    video_url = None
-    audio_url = None
-    
+    # Copy the media out of the request; it is uploaded after the report is saved
+    # Content already in storage (same SHA-256) gets its URL at once and is not uploaded again
+    storage = get_media_storage()
+    max_memory = current_app.config.get("IN_MEMORY_UPLOAD_MAX_BYTES", 1024 * 1024)
+    media = {}
+    urls = {}
     try:
-        if "image" in request.files and request.files["image"].filename:
-            image_url = upload_to_cloudinary(request.files.get("image"), "sos_images")
-            
-        if "video" in request.files and request.files["video"].filename:
-            video_url = upload_to_cloudinary(request.files.get("video"), "sos_videos")
-            
-        if "audio" in request.files and request.files["audio"].filename:
-            audio_url = upload_to_cloudinary(request.files.get("audio"), "sos_audio")
+        for field, (folder, column) in MEDIA_FIELDS.items():
+            file = request.files.get(field)
+            if not file or not file.filename:
+                continue
+            stream, digest = spool_upload(file, max_memory)
+            url = storage.known_url(folder, digest)
+            if url is not None:
+                stream.close()
+                urls[column] = url
+            else:
+                media[field] = (stream, folder, file.content_type, digest)
     except Exception as e:
-        return jsonify({"error": f"Media upload failed: {str(e)}"}), 500
-    
-    # Save to database
+        for stream, *_ in media.values():
+            stream.close()
+        return jsonify({"error": f"Reading media failed: {str(e)}"}), 400
+
+    # Save to database right away; media URLs are filled in as uploads finish
     new_sos = SOSReport(
         title=title,
         severity=severity,
         location=location,
         status="Pending",
         reported_at=datetime.utcnow(),
-        image_url=image_url,
-        video_url=video_url,
-        audio_url=audio_url
+        media_status="pending" if media else ("complete" if urls else None),
+        **coordinates_for(location),
+        **urls
     )
     
     if hasattr(new_sos, "user_id"):
@@ -104,18 +202,133 @@ def send_sos():
     try:
         db.session.add(new_sos)
         db.session.commit()
-        
-        return jsonify({
-            "message": "SOS alert sent!",
-            "id": new_sos.id,
-            "image_url": image_url,
-            "video_url": video_url,
-            "audio_url": audio_url
-        }), 201
     except Exception as e:
         db.session.rollback()
+        for stream, *_ in media.values():
+            stream.close()
         return jsonify({"error": f"Database error: {str(e)}"}), 500
 
+    events.publish("sos", "create", serialize_sos(new_sos))
+    get_media_uploader().submit(new_sos.id, media)
+    return jsonify({
+        "message": "SOS alert sent!",
+        "id": new_sos.id,
+        "media_status": new_sos.media_status,
+        "pending_media": sorted(media),
+        "image_url": new_sos.image_url,
+        "video_url": new_sos.video_url,
+        "audio_url": new_sos.audio_url
+    }), 201
+
+@sos_bp.route("/media/<path:filename>", methods=["GET"])
+def get_media(filename):
+    """
+    Serve media kept by the local storage backend, with the MIME type it was
+    uploaded with (files are named by content hash alone).
+    """
+    storage = get_media_storage()
+    if not isinstance(storage, LocalStorage):
+        abort(404)
+    stored = db.session.get(StoredMedia, (current_app.config.get("MEDIA_STORAGE"), filename))
+    mimetype = stored.content_type if stored is not None and stored.content_type else None
+    return send_from_directory(storage.root, filename, mimetype=mimetype, max_age=31536000)
+
+def sos_mapping(data):
+    """Column values of an SOS record for bulk ingest; raises ValueError if invalid"""
+    if not data.get("user_id") or not data.get("severity") or not data.get("location"):
+        raise ValueError("user_id, severity, and location are required")
+    reported_at = datetime.utcnow()
+    if data.get("reported_at"):
+        try:
+            reported_at = datetime.fromisoformat(data["reported_at"])
+        except (TypeError, ValueError):
+            raise ValueError("reported_at must be an ISO 8601 timestamp") from None
+    return {
+        "title": data.get("title", "SOS Alert"),
+        "severity": data["severity"],
+        "location": data["location"],
+        "status": data.get("status") or "Pending",
+        "reported_at": reported_at,
+        "updated_at": datetime.utcnow(),
+        **coordinates_for(data["location"]),
+    }
+
+@sos_bp.route("/bulk", methods=["POST"])
+def bulk_send_sos():
+    """
+    Create many SOS reports in one request, e.g. reports queued on an
+    offline device: a JSON array of objects with the form fields of
+    POST /api/sos/ (media URLs are not accepted) plus an optional
+    reported_at, or an NDJSON body (Content-Type: application/x-ndjson).
+    Every record gets a result ("created" with its id, "invalid" or
+    "failed" with the error) so only failures need resending.
+    """
+    config = current_app.config
+    max_records = config.get("BULK_MAX_RECORDS", 10000)
+    try:
+        records = iter_records(request.mimetype, request.stream, request.get_json)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if isinstance(records, list) and len(records) > max_records:
+        return jsonify({"error": f"A batch may hold at most {max_records} records"}), 413
+
+    results, truncated = bulk_insert(
+        db.session,
+        SOSReport,
+        records,
+        sos_mapping,
+        chunk_size=config.get("BULK_CHUNK_SIZE", 500),
+        max_records=max_records,
+    )
+    # One event for the whole batch: a large batch would flush the replay buffer
+    created = created_summary(results)
+    if created:
+        events.publish("sos", "bulk_create", created)
+    return jsonify(summarize(results, truncated)), 200
+
+@sos_bp.route("/nearby", methods=["GET"])
+def get_nearby_sos():
+    """
+    SOS reports within ?radius_km= (default 5, at most GEO_MAX_RADIUS_KM) of
+    ?lat=&lng=, nearest first. Optional ?status= filter. Only reports with a
+    "lat,lng" location are found.
+    """
+    try:
+        lat, lng = point_from_args(request.args)
+        radius_km = radius_from_args(request.args, default=5, max_km=current_app.config.get("GEO_MAX_RADIUS_KM", 100))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = SOSReport.query
+    if request.args.get("status"):
+        query = query.filter(SOSReport.status == request.args["status"])
+    results = within_radius(query, SOSReport, lat, lng, radius_km)
+    return jsonify([
+        {**serialize_sos(report), "distance_km": round(distance, 3)} for report, distance in results
+    ]), 200
+
+@sos_bp.route("/nearest", methods=["GET"])
+def get_nearest_sos():
+    """
+    The ?k= (default 5) pending SOS reports nearest ?lat=&lng=, nearest first.
+    ?status= picks another status; ?max_km= (at most GEO_MAX_RADIUS_KM) bounds
+    the search distance.
+    """
+    try:
+        lat, lng = point_from_args(request.args)
+        k = int(request.args.get("k", 5))
+        max_km = radius_from_args(request.args, "max_km", max_km=current_app.config.get("GEO_MAX_RADIUS_KM", 100))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not 1 <= k <= current_app.config.get("MAX_PAGE_SIZE", 500):
+        return jsonify({"error": "k is out of range"}), 400
+
+    query = SOSReport.query.filter(SOSReport.status == request.args.get("status", "Pending"))
+    results = nearest(query, SOSReport, lat, lng, k, max_km)
+    return jsonify([
+        {**serialize_sos(report), "distance_km": round(distance, 3)} for report, distance in results
+    ]), 200
+
 @sos_bp.route("/<int:sos_id>/resolve", methods=["PUT"])
 def resolve_sos(sos_id):
     """
@@ -127,6 +340,7 @@ def resolve_sos(sos_id):
 
     sos.status = "Resolved"
     db.session.commit()
+    events.publish("sos", "resolve", serialize_sos(sos))
     return jsonify({"message": "SOS report resolved successfully!"}), 200
 
 @sos_bp.route("/<int:sos_id>", methods=["PUT"])
@@ -141,12 +355,16 @@ def update_sos(sos_id):
     data = request.json
     sos.title = data.get("title", sos.title)
     sos.severity = data.get("severity", sos.severity)
-    sos.location = data.get("location", sos.location)
+    if data.get("location") and data["location"] != sos.location:
+        sos.location = data["location"]
+        for column, value in coordinates_for(sos.location).items():
+            setattr(sos, column, value)
     sos.status = data.get("status", sos.status)
     sos.reported_at = datetime.fromisoformat(data.get("reported_at", sos.reported_at.isoformat()))
 
     try:
         db.session.commit()
+        events.publish("sos", "update", serialize_sos(sos))
         return jsonify({"message": "SOS report updated successfully!"}), 200
     except Exception as e:
         db.session.rollback()
@@ -163,7 +381,9 @@ def delete_sos(sos_id):
 
     try:
         db.session.delete(sos)
+        record_tombstone("sos", sos_id, current_app.config.get("TOMBSTONE_RETENTION_DAYS", 30))
         db.session.commit()
+        events.publish("sos", "delete", {"id": sos_id})
         return jsonify({"message": "SOS report deleted successfully!"}), 200
     except Exception as e:
         db.session.rollback()
@@ -1,18 +1,30 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models import db, User
+from services.pagination import InvalidPage, paginate_request
 
 users_bp = Blueprint('users', __name__)
 
 @users_bp.route('', methods=['GET'])
 def get_users():
-    users = User.query.all()
+    # Pages in id order: ?limit= and ?cursor=; ?all=true returns every user
+    try:
+        users, headers = paginate_request(
+            User.query,
+            [(User.id, False)],
+            request.args,
+            request.base_url,
+            current_app.config.get('PAGE_SIZE', 50),
+            current_app.config.get('MAX_PAGE_SIZE', 500),
+        )
+    except InvalidPage as e:
+        return jsonify({"error": str(e)}), 400
     data = [{
         'id': user.id,
         'name': user.name,
         'email': user.email,
         'role': user.role
     } for user in users]
-    return jsonify(data), 200
+    return jsonify(data), 200, headers
 
 @users_bp.route('/<int:user_id>', methods=["PUT"])
 def update_user(user_id):
@@ -0,0 +1,3 @@
+# services/__init__.py
+# Shared building blocks used by the route blueprints (model lifecycle,
+# batching, caching, storage, ...). Nothing here registers routes.
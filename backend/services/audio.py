@@ -0,0 +1,170 @@
+# services/audio.py
+import io
+import subprocess
+
+from pydub import AudioSegment  # type: ignore
+from pydub.exceptions import CouldntDecodeError  # type: ignore
+from pydub.utils import mediainfo_json  # type: ignore
+
+# Native input format of the Vosk models: 16 kHz, mono, 16-bit
+TARGET_SAMPLE_RATE = 16000
+
+
+def _silent_edges(audio, threshold_dbfs, chunk_ms=10):
+    """
+    Return (leading_ms, trailing_ms) of audio quieter than threshold_dbfs.
+    A clip shorter than one chunk is left untrimmed.
+    """
+    duration = len(audio)
+    if duration < chunk_ms:
+        return 0, 0
+    leading = 0
+    while leading < duration and audio[leading:min(leading + chunk_ms, duration)].dBFS < threshold_dbfs:
+        leading += chunk_ms
+    leading = min(leading, duration)
+    trailing = 0
+    while trailing < duration - leading:
+        # Never reach back past the leading silence, so bounds stay non-negative
+        end = duration - trailing
+        if audio[max(leading, end - chunk_ms):end].dBFS >= threshold_dbfs:
+            break
+        trailing += chunk_ms
+    return leading, min(trailing, duration - leading)
+
+
+def _decode_mono_pcm(data, sample_rate):
+    """
+    Decode an upload to 16-bit mono PCM at `sample_rate` with one ffmpeg run.
+    Unlike AudioSegment.from_file this does not probe the input again.
+    """
+    command = [AudioSegment.converter, "-nostdin", "-loglevel", "error"]
+    if AudioSegment.converter == "ffmpeg":
+        command += ["-read_ahead_limit", "-1", "-i", "cache:pipe:0"]
+    else:
+        command += ["-i", "-"]
+    command += ["-vn", "-ac", "1", "-ar", str(sample_rate), "-acodec", "pcm_s16le", "-f", "s16le", "-"]
+    process = subprocess.run(command, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        raise CouldntDecodeError(
+            f"Decoding failed. ffmpeg returned error code: {process.returncode}\n\n"
+            f"{process.stderr.decode('utf-8', 'replace')}"
+        )
+    pcm = process.stdout
+    return AudioSegment(data=pcm[:len(pcm) - len(pcm) % 2], sample_width=2, frame_rate=sample_rate, channels=1)
+
+
+def normalize_audio(data: bytes, sample_rate=TARGET_SAMPLE_RATE, trim_dbfs=-45.0):
+    """
+    Decode an upload straight to the recognizer's native format: ffmpeg
+    downmixes to mono, resamples to `sample_rate` and converts to 16-bit
+    PCM in the same decoding pass. The input is probed once, for the
+    report. Leading and trailing audio quieter than `trim_dbfs` is then
+    cut off.
+
+    Returns (pcm, report) where report describes the source format and how
+    many bytes of PCM the normalization and the trimming removed compared
+    to decoding the source at its own rate, channel count and bit depth.
+    """
+    source = {}
+    try:
+        streams = [s for s in mediainfo_json(io.BytesIO(data)).get("streams", []) if s.get("codec_type") == "audio"]
+        if streams:
+            source = streams[0]
+    except Exception:
+        pass
+
+    audio = _decode_mono_pcm(data, sample_rate)
+    normalized_bytes = len(audio.raw_data)
+
+    leading_ms, trailing_ms = _silent_edges(audio, trim_dbfs)
+    if leading_ms or trailing_ms:
+        audio = audio[leading_ms:len(audio) - trailing_ms]
+    pcm = audio.raw_data
+
+    seconds = normalized_bytes / (sample_rate * 2)
+    source_rate = int(source.get("sample_rate") or sample_rate)
+    source_channels = int(source.get("channels") or 1)
+    source_width = max(1, int(source.get("bits_per_sample") or 16) // 8)
+    source_bytes = int(seconds * source_rate * source_channels * source_width)
+
+    report = {
+        "source_sample_rate": source_rate,
+        "source_channels": source_channels,
+        "sample_rate": sample_rate,
+        "duration_seconds": round(seconds, 3),
+        "trimmed_seconds": round((leading_ms + trailing_ms) / 1000, 3),
+        "source_pcm_bytes": source_bytes,
+        "normalized_bytes": normalized_bytes,
+        "output_bytes": len(pcm),
+        "bytes_removed_by_resampling": max(0, source_bytes - normalized_bytes),
+        "bytes_removed_by_trimming": normalized_bytes - len(pcm),
+    }
+    report["bytes_removed"] = report["bytes_removed_by_resampling"] + report["bytes_removed_by_trimming"]
+    return pcm, report
+
+
+def iter_pcm_chunks(pcm: bytes, frame_width: int, frames_per_chunk=4000):
+    """Yield consecutive chunks of `frames_per_chunk` frames from raw PCM bytes"""
+    step = frames_per_chunk * frame_width
+    for offset in range(0, len(pcm), step):
+        yield pcm[offset:offset + step]
+
+
+def voiced_segments(pcm: bytes, sample_rate: int, silence_dbfs=-40.0, frame_ms=30,
+                    min_silence_ms=400, padding_ms=150, max_segment_seconds=30.0, max_bridge_ms=1000):
+    """
+    Energy-based voice activity detection over 16-bit mono PCM.
+
+    Returns (start, end) byte offsets of voiced stretches, split at pauses of
+    at least `min_silence_ms` and padded by `padding_ms` on both sides.
+    Neighbouring stretches separated by less than `max_bridge_ms` are merged
+    while they fit in `max_segment_seconds`; longer silences are dropped.
+    Speech longer than `max_segment_seconds` is cut at that length so no
+    single segment dominates a parallel run.
+    """
+    import numpy as np  # type: ignore
+
+    samples = np.frombuffer(pcm[:len(pcm) - len(pcm) % 2], dtype=np.int16)
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return [(0, len(samples) * 2)] if len(samples) else []
+
+    frames = samples[:n_frames * frame_len].astype(np.float32).reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1)) / 32768.0
+    voiced = 20 * np.log10(np.maximum(rms, 1e-10)) > silence_dbfs
+
+    # Group voiced frames, bridging pauses shorter than min_silence_ms
+    min_gap = max(1, int(min_silence_ms / frame_ms))
+    regions = []
+    start = None
+    gap = 0
+    for i, is_voiced in enumerate(voiced):
+        if is_voiced:
+            if start is None:
+                start = i
+            gap = 0
+        elif start is not None:
+            gap += 1
+            if gap >= min_gap:
+                regions.append((start, i - gap + 1))
+                start, gap = None, 0
+    if start is not None:
+        regions.append((start, n_frames - gap))
+
+    pad = int(padding_ms / frame_ms)
+    max_bridge = int(max_bridge_ms / frame_ms)
+    max_frames = max(1, int(max_segment_seconds * 1000 / frame_ms))
+    segments = []
+    for first, last in regions:
+        first, last = max(0, first - pad), min(n_frames, last + pad)
+        if segments and last - segments[-1][0] <= max_frames and first - segments[-1][1] <= max_bridge:
+            segments[-1] = (segments[-1][0], last)
+            continue
+        while last - first > max_frames:
+            segments.append((first, first + max_frames))
+            first += max_frames
+        segments.append((first, last))
+
+    bytes_per_frame = frame_len * 2
+    return [(first * bytes_per_frame, last * bytes_per_frame) for first, last in segments]
@@ -0,0 +1,123 @@
+# services/batching.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Gathers items submitted from concurrent request threads into batches and
+    runs every batch through a single call of `handler`.
+
+    `handler` receives a list of items and must return a list of outputs of the
+    same length; each output is delivered to the Future of the matching item.
+    A batch is dispatched as soon as it holds `max_batch_size` items or the
+    oldest queued item has waited `max_wait_ms`, whichever comes first.
+    """
+
+    def __init__(self, handler, max_batch_size=8, max_wait_ms=10.0, name="micro-batcher", history=1024):
+        self.handler = handler
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = deque()
+        self._cond = threading.Condition()
+
+        # Statistics (guarded by _stats_lock)
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._size_counts = {}
+        self._waits = deque(maxlen=history)
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        """Queue an item and return a Future that resolves to its output."""
+        future = Future()
+        with self._cond:
+            self._queue.append((item, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0][2] + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = [entry for entry in self._next_batch() if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            dispatched_at = time.perf_counter()
+            failed = False
+            try:
+                outputs = self.handler([item for item, _, _ in batch])
+                if len(outputs) != len(batch):
+                    raise RuntimeError(
+                        f"Batch handler returned {len(outputs)} outputs for {len(batch)} inputs"
+                    )
+            except Exception as e:
+                failed = True
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), output in zip(batch, outputs):
+                    future.set_result(output)
+
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._errors += int(failed)
+                self._size_counts[len(batch)] = self._size_counts.get(len(batch), 0) + 1
+                self._waits.extend(dispatched_at - enqueued_at for _, _, enqueued_at in batch)
+
+    def stats(self) -> dict:
+        """
+        Report batch fill and queue-wait statistics. Wait times are computed over
+        the most recent requests and reported in milliseconds.
+        """
+        with self._cond:
+            queued = len(self._queue)
+        with self._stats_lock:
+            batches = self._batches
+            items = self._items
+            waits = sorted(self._waits)
+            size_counts = dict(sorted(self._size_counts.items()))
+            errors = self._errors
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            index = min(len(waits) - 1, int(round(p / 100.0 * (len(waits) - 1))))
+            return round(waits[index] * 1000.0, 3)
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queued": queued,
+            "batches": batches,
+            "items": items,
+            "errors": errors,
+            "avg_batch_size": round(items / batches, 3) if batches else 0.0,
+            "avg_batch_fill": round(items / (batches * self.max_batch_size), 3) if batches else 0.0,
+            "batch_size_counts": size_counts,
+            "queue_wait_ms": {
+                "avg": round(sum(waits) / len(waits) * 1000.0, 3) if waits else 0.0,
+                "p50": percentile(50),
+                "p95": percentile(95),
+                "max": round(waits[-1] * 1000.0, 3) if waits else 0.0,
+            },
+        }
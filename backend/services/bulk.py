@@ -0,0 +1,115 @@
+# services/bulk.py
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl")
+
+
+def iter_ndjson(stream):
+    """Records from an NDJSON body, read line by line; yields a record or the error for a bad line"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+
+
+def iter_records(mimetype, stream, get_json):
+    """
+    Records of a bulk request: an NDJSON stream, or a JSON array (also
+    accepted as {"records": [...]}). Malformed lines come out as ValueError
+    items so they get a per-record result.
+    """
+    if mimetype in NDJSON_MIMETYPES:
+        return iter_ndjson(stream)
+    data = get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("records")
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of records or an NDJSON body")
+    return data
+
+
+def bulk_insert(session, model, records, validate, chunk_size=500, max_records=10000):
+    """
+    Validate records and insert the valid ones in chunks, each chunk with
+    one executemany (bulk_insert_mappings) in its own transaction. A chunk
+    that fails as a whole is retried row by row so only the offending
+    records fail.
+
+    `validate(record)` returns the column mapping or raises ValueError.
+    Returns (results, truncated): one result per record, in input order,
+    {"index", "status": created | invalid | failed, "id" or "error"}, and
+    whether reading stopped at `max_records` with records left over.
+    """
+    results = []
+    chunk = []  # (index, mapping)
+
+    def flush():
+        if not chunk:
+            return
+        mappings = [mapping for _, mapping in chunk]
+        try:
+            session.bulk_insert_mappings(model, mappings, return_defaults=True)
+            session.commit()
+            inserted = chunk[:]
+        except Exception:
+            session.rollback()
+            logger.warning("Bulk insert of %d %s rows failed, retrying one by one", len(chunk), model.__tablename__)
+            inserted = []
+            for index, mapping in chunk:
+                mapping.pop("id", None)
+                try:
+                    session.bulk_insert_mappings(model, [mapping], return_defaults=True)
+                    session.commit()
+                    inserted.append((index, mapping))
+                except Exception as e:
+                    session.rollback()
+                    results.append({"index": index, "status": "failed", "error": str(e)})
+        for index, mapping in inserted:
+            results.append({"index": index, "status": "created", "id": mapping.get("id")})
+        chunk.clear()
+
+    truncated = False
+    for index, record in enumerate(records):
+        if index >= max_records:
+            truncated = True
+            break
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError("Each record must be a JSON object")
+            chunk.append((index, validate(record)))
+        except ValueError as e:
+            results.append({"index": index, "status": "invalid", "error": str(e)})
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+
+    results.sort(key=lambda result: result["index"])
+    return results, truncated
+
+
+def created_summary(results):
+    """
+    Payload of the single change event published for a bulk request: how
+    many rows were created and their id range, or None if none were.
+    """
+    ids = [result["id"] for result in results if result["status"] == "created" and result.get("id") is not None]
+    if not ids:
+        return None
+    return {"created": len(ids), "firstId": min(ids), "lastId": max(ids)}
+
+
+def summarize(results, truncated=False):
+    counts = {"created": 0, "invalid": 0, "failed": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {**counts, "truncated": truncated, "results": results}
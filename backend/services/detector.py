@@ -0,0 +1,203 @@
+# services/detector.py
+import os
+import time
+import logging
+import threading
+
+import numpy as np  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# onnxruntime.GraphOptimizationLevel members by config name
+GRAPH_OPT_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+
+class DetectorLifecycle:
+    """
+    Owns the accident-detection YOLO model: resolves the weights, loads them,
+    applies the runtime thread/optimization settings and runs warm-up
+    inferences at the production input size so the first real request does
+    not pay for model load and graph initialization.
+
+    Configured through `init_app(app)` like the Flask extensions:
+      PREDICT_MODEL_PATH       explicit weights path (default: ONNX model, then best.pt)
+      PREDICT_IMGSZ            inference input size used for warm-up and requests
+      PREDICT_WARMUP_RUNS      number of warm-up inferences
+      PREDICT_INTRA_OP_THREADS / PREDICT_INTER_OP_THREADS  0 keeps the runtime default
+      PREDICT_GRAPH_OPT_LEVEL  ONNX Runtime graph optimization: disable, basic, extended, all
+    When loading happens is decided by the model registry (MODEL_LOADING).
+    """
+
+    def __init__(self):
+        self.model = None
+        self.model_path = None
+        self.imgsz = 640
+        self.warmup_runs = 2
+        self.intra_op_threads = 0
+        self.inter_op_threads = 0
+        self.graph_opt_level = "all"
+        self.state = "cold"  # cold -> loading -> warming -> ready | failed
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.configure(app.config)
+
+    def configure(self, config):
+        """Apply PREDICT_* settings from a mapping (app.config or a plain dict)"""
+        self.model_path = config.get("PREDICT_MODEL_PATH") or self.default_model_path()
+        self.imgsz = int(config.get("PREDICT_IMGSZ", 640))
+        self.warmup_runs = int(config.get("PREDICT_WARMUP_RUNS", 2))
+        self.intra_op_threads = int(config.get("PREDICT_INTRA_OP_THREADS", 0))
+        self.inter_op_threads = int(config.get("PREDICT_INTER_OP_THREADS", 0))
+        self.graph_opt_level = str(config.get("PREDICT_GRAPH_OPT_LEVEL", "all")).lower()
+        if self.graph_opt_level not in GRAPH_OPT_LEVELS:
+            raise ValueError(f"Unknown PREDICT_GRAPH_OPT_LEVEL {self.graph_opt_level!r}")
+
+    @staticmethod
+    def default_model_path():
+        model_path = os.path.join(BASE_DIR, "ResqBridgeAccidentDetection.onnx")
+        if not os.path.exists(model_path):
+            model_path = os.path.join(BASE_DIR, "best.pt")  # Fallback model
+        return model_path
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def get(self):
+        """Return the warmed-up model, loading it first if needed"""
+        if self.model is not None and self.ready:
+            return self.model
+        with self._lock:
+            if self.model is None or not self.ready:
+                self._load_and_warm_up()
+        return self.model
+
+    def _load_and_warm_up(self):
+        from ultralytics import YOLO  # type: ignore
+
+        if self.model_path is None:
+            self.model_path = self.default_model_path()
+        try:
+            self.state = "loading"
+            started = time.perf_counter()
+            self._configure_torch_threads()
+            self.model = YOLO(self.model_path)
+            self.load_seconds = time.perf_counter() - started
+
+            self.state = "warming"
+            started = time.perf_counter()
+            self.warm_up()
+            self.warmup_seconds = time.perf_counter() - started
+            self.error = None
+            self.state = "ready"
+            logger.info(
+                "Detector %s ready (load %.2fs, warm-up %.2fs)",
+                self.model_path, self.load_seconds, self.warmup_seconds,
+            )
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.exception("Failed to load detector from %s", self.model_path)
+            raise
+
+    def warm_up(self):
+        """
+        Run dummy inferences at the production input size. The first call
+        builds the predictor (and the ONNX Runtime session behind it), which is
+        then replaced by one created with the configured session options.
+        """
+        dummy = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        runs = max(1, self.warmup_runs)
+        for i in range(runs):
+            self.model(dummy, imgsz=self.imgsz, conf=0.25, save=False, verbose=False)
+            if i == 0:
+                self._tune_onnx_session()
+                # Initialize the tuned session before traffic arrives
+                self.model(dummy, imgsz=self.imgsz, conf=0.25, save=False, verbose=False)
+
+    def _configure_torch_threads(self):
+        if not self.model_path.endswith(".pt"):
+            return
+        try:
+            import torch  # type: ignore
+            if self.intra_op_threads > 0:
+                torch.set_num_threads(self.intra_op_threads)
+            if self.inter_op_threads > 0:
+                torch.set_num_interop_threads(self.inter_op_threads)
+        except RuntimeError as e:
+            # set_num_interop_threads may only be called once per process
+            logger.warning("Could not apply torch thread settings: %s", e)
+
+    def _tune_onnx_session(self):
+        backend = getattr(getattr(self.model, "predictor", None), "model", None)
+        session = getattr(backend, "session", None)
+        if session is None or not self.model_path.endswith(".onnx"):
+            return
+        if getattr(backend, "io", None) is not None:
+            # GPU IO binding is tied to the original session; keep it as is
+            logger.info("ONNX session uses IO binding, skipping session tuning")
+            return
+
+        import onnxruntime as ort  # type: ignore
+
+        options = ort.SessionOptions()
+        if self.intra_op_threads > 0:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads > 0:
+            options.inter_op_num_threads = self.inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+        options.graph_optimization_level = getattr(
+            ort.GraphOptimizationLevel, GRAPH_OPT_LEVELS[self.graph_opt_level]
+        )
+        backend.session = ort.InferenceSession(
+            self.model_path, sess_options=options, providers=session.get_providers()
+        )
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "model_path": self.model_path,
+            "imgsz": self.imgsz,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "graph_opt_level": self.graph_opt_level,
+            "error": self.error,
+        }
+
+
+def extract_detections(result):
+    """Convert a YOLO result into a list of plain detection dicts"""
+    boxes = result.boxes
+    if not hasattr(boxes, "conf") or len(boxes.conf) == 0:
+        return []
+
+    confs = boxes.conf.tolist()
+    coords = boxes.xyxy.tolist() if hasattr(boxes, "xyxy") else []
+    classes = boxes.cls.tolist() if hasattr(boxes, "cls") else []
+    names = [result.names[int(cls)] for cls in classes] if hasattr(result, "names") else []
+
+    return [
+        {
+            "class": names[i] if i < len(names) else "unknown",
+            "confidence": conf,
+            "coordinates": coords[i] if i < len(coords) else None,
+        }
+        for i, conf in enumerate(confs)
+    ]
+
+
+detector = DetectorLifecycle()
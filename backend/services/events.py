@@ -0,0 +1,157 @@
+# services/events.py
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    import fcntl
+except ImportError:  # Windows: the single-process check is skipped
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class BrokerUnavailable(RuntimeError):
+    """Raised when another server process already serves the change feed"""
+
+
+class EventBroker:
+    """
+    In-process publish/subscribe for change events (create, update, resolve,
+    delete of SOS reports and incidents).
+
+    Event ids are "<boot>-<n>": a token chosen when the process starts and
+    an increasing counter. The last `buffer_size` events are kept, so a
+    client that reconnects with the id of the last event it saw receives
+    exactly what it missed. A client whose id is from another boot, or has
+    already dropped out of the buffer, is told to reload instead.
+
+    Events only reach subscribers of the process that published them, so the
+    feed needs a single server process (scale with threads, e.g. gunicorn
+    -w 1 --threads N). Only a process that serves the events blueprint
+    (`configure(..., serve=True)`) takes part: on first use it takes an
+    exclusive lock on `lock_path`. Everywhere else publish() is a no-op
+    (with one warning) and subscribing raises BrokerUnavailable.
+    """
+
+    def __init__(self, buffer_size=1000, lock_path=None):
+        self._buffer = deque(maxlen=max(1, int(buffer_size)))
+        self._condition = threading.Condition()
+        self._seq = 0
+        self.boot = f"{int(time.time()):x}{os.getpid():x}"
+        self.subscribers = 0
+        self.lock_path = lock_path
+        self.serve = False
+        self._lock_file = None
+        self._owner = None  # True once this process holds the lock, False if it may not serve
+        self._warned = False
+
+    def configure(self, buffer_size, lock_path=None, serve=False):
+        with self._condition:
+            self._buffer = deque(self._buffer, maxlen=max(1, int(buffer_size)))
+            self.lock_path = lock_path
+            self.serve = serve
+
+    def _claim(self):
+        """Whether this process serves the feed; takes the lock the first time"""
+        with self._condition:
+            if self._owner is None and self.serve:
+                self._owner = self._lock()
+            return bool(self._owner)
+
+    def _lock(self):
+        if not self.lock_path or fcntl is None:
+            return True
+        lock_file = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            logger.error("The change feed is served by another process (lock %s held); run a single "
+                         "server process or disable the events blueprint", self.lock_path)
+            return False
+        lock_file.truncate(0)
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._lock_file = lock_file
+        return True
+
+    def event_id(self, seq):
+        return f"{self.boot}-{seq}"
+
+    def resume_point(self, last_event_id):
+        """
+        Position to stream from for a client's Last-Event-ID: (seq, reset).
+        reset is True when the id is not from this boot (or not an id at
+        all), so the client must reload; streaming then starts at the
+        newest event.
+        """
+        current = self.last_seq
+        if not last_event_id:
+            return current, False
+        boot, _, seq = last_event_id.rpartition("-")
+        if boot != self.boot or not seq.isdigit() or int(seq) > current:
+            return current, True
+        return int(seq), False
+
+    def add_subscriber(self, delta=1):
+        if delta > 0 and not self._claim():
+            raise BrokerUnavailable("The change feed is not served by this server process")
+        with self._condition:
+            self.subscribers += delta
+
+    def publish(self, topic, action, data):
+        """Record an event and wake every waiting subscriber; returns its id (None if not serving)"""
+        if not self._claim():
+            if not self._warned:
+                self._warned = True
+                logger.warning("This process does not serve the change feed; its events are not published")
+            return None
+        with self._condition:
+            self._seq += 1
+            event = {
+                "id": self.event_id(self._seq), "seq": self._seq,
+                "topic": topic, "action": action, "data": data, "time": time.time(),
+            }
+            self._buffer.append(event)
+            self._condition.notify_all()
+        return event["id"]
+
+    @property
+    def last_seq(self):
+        with self._condition:
+            return self._seq
+
+    def since(self, seq, topics=None, timeout=None):
+        """
+        Events after sequence number `seq` (filtered to `topics`), waiting up
+        to `timeout` seconds for one to arrive. Returns (events, new seq,
+        gap); gap is True, with no events, when some events after `seq` are
+        no longer buffered and the client has to reload.
+        """
+        with self._condition:
+            if timeout and seq == self._seq:
+                self._condition.wait(timeout)
+            oldest = self._buffer[0]["seq"] if self._buffer else self._seq + 1
+            if seq > self._seq or oldest > seq + 1:
+                return [], self._seq, True
+            events = [e for e in self._buffer if e["seq"] > seq]
+            new_seq = self._seq
+        if topics:
+            events = [e for e in events if e["topic"] in topics]
+        return events, new_seq, False
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "last_id": self.event_id(self._seq),
+                "buffered": len(self._buffer),
+                "buffer_size": self._buffer.maxlen,
+                "subscribers": self.subscribers,
+                "serving": bool(self._owner),
+            }
+
+
+events = EventBroker()
@@ -0,0 +1,178 @@
+# services/geo.py
+import math
+import re
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+GEOHASH_PRECISION = 9  # stored precision, cells of about 4.8 m x 4.8 m
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_LAT_LNG = re.compile(r"^\s*\(?\s*(-?\d+(?:\.\d+)?)\s*[,; ]\s*(-?\d+(?:\.\d+)?)\s*\)?\s*$")
+
+
+def parse_location(location):
+    """(latitude, longitude) from a "lat,lng" location string, or None for an address"""
+    match = _LAT_LNG.match(location or "")
+    if not match:
+        return None
+    lat, lng = float(match.group(1)), float(match.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = bit_count = 0
+    even = True  # even bits refine longitude
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+
+def coordinates_for(location):
+    """Column values (latitude, longitude, geohash) for a location string; all None if it is not "lat,lng" """
+    point = parse_location(location)
+    if point is None:
+        return {"latitude": None, "longitude": None, "geohash": None}
+    return {"latitude": point[0], "longitude": point[1], "geohash": encode_geohash(*point)}
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cell_size_degrees(precision):
+    """(height, width) in degrees of a geohash cell"""
+    bits = 5 * precision
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def covered_radius_km(lat, precision):
+    """Distance around a point within which the 3x3 cells centred on its cell cover everything"""
+    height, width = cell_size_degrees(precision)
+    return min(height * KM_PER_DEGREE, width * KM_PER_DEGREE * max(math.cos(math.radians(abs(lat) + height)), 0.0))
+
+
+def covering_cells(lat, lng, precision):
+    """The geohash cell of a point and its (up to) eight neighbours"""
+    height, width = cell_size_degrees(precision)
+    cells = set()
+    for d_lat in (-height, 0.0, height):
+        neighbour_lat = lat + d_lat
+        if not -90 <= neighbour_lat <= 90:
+            continue
+        for d_lng in (-width, 0.0, width):
+            neighbour_lng = (lng + d_lng + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(neighbour_lat, neighbour_lng, precision))
+    return sorted(cells)
+
+
+def precision_for_radius(lat, radius_km):
+    """Finest geohash precision whose 3x3 neighbourhood covers a circle of `radius_km`, or 0 if none does"""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        if covered_radius_km(lat, precision) >= radius_km:
+            return precision
+    return 0
+
+
+def prefix_filter(column, cells):
+    """
+    SQL condition for "geohash starts with one of `cells`", as index range
+    scans (cell <= geohash < cell + "~") rather than LIKE.
+    """
+    from sqlalchemy import and_, or_
+
+    return or_(*[and_(column >= cell, column < cell + "~") for cell in cells])
+
+
+def within_radius(query, model, lat, lng, radius_km):
+    """
+    Rows of `model` within `radius_km` of a point, nearest first, as a list of
+    (row, distance_km). The geohash index narrows the candidates to the
+    cells around the point; exact distances are checked in Python.
+    """
+    precision = precision_for_radius(lat, radius_km)
+    query = query.filter(model.geohash.isnot(None))
+    if precision:
+        query = query.filter(prefix_filter(model.geohash, covering_cells(lat, lng, precision)))
+    results = []
+    for row in query.all():
+        distance = haversine_km(lat, lng, row.latitude, row.longitude)
+        if distance <= radius_km:
+            results.append((row, distance))
+    results.sort(key=lambda item: item[1])
+    return results
+
+
+def nearest(query, model, lat, lng, k, max_radius_km=None):
+    """
+    The `k` rows of `model` nearest a point, as (row, distance_km) pairs.
+    Searches the cells around the point from fine to coarse precision until
+    at least k rows are inside the radius those cells fully cover.
+    """
+    query = query.filter(model.geohash.isnot(None))
+    for precision in range(GEOHASH_PRECISION - 2, 0, -1):
+        radius = covered_radius_km(lat, precision)
+        if max_radius_km is not None:
+            radius = min(radius, max_radius_km)
+        candidates = query.filter(prefix_filter(model.geohash, covering_cells(lat, lng, precision))).all()
+        found = [(row, haversine_km(lat, lng, row.latitude, row.longitude)) for row in candidates]
+        found = [item for item in found if item[1] <= radius]
+        if len(found) >= k or (max_radius_km is not None and radius >= max_radius_km):
+            found.sort(key=lambda item: item[1])
+            return found[:k]
+
+    found = [(row, haversine_km(lat, lng, row.latitude, row.longitude)) for row in query.all()]
+    if max_radius_km is not None:
+        found = [item for item in found if item[1] <= max_radius_km]
+    found.sort(key=lambda item: item[1])
+    return found[:k]
+
+
+def point_from_args(args):
+    """(lat, lng) from ?lat=&lng= query parameters; raises ValueError if missing or out of range"""
+    try:
+        lat, lng = float(args["lat"]), float(args["lng"])
+    except (KeyError, ValueError):
+        raise ValueError("lat and lng are required numbers") from None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("lat must be within [-90, 90] and lng within [-180, 180]")
+    return lat, lng
+
+
+def radius_from_args(args, name="radius_km", default=None, max_km=None):
+    """
+    Search radius in km from the ?<name>= query parameter, or `default` when
+    it is absent; raises ValueError unless it is finite, positive and at most
+    `max_km`.
+    """
+    if not args.get(name):
+        return default
+    try:
+        radius_km = float(args[name])
+    except ValueError:
+        raise ValueError(f"{name} must be a number") from None
+    if not math.isfinite(radius_km) or radius_km <= 0:
+        raise ValueError(f"{name} must be a finite, positive number")
+    if max_km is not None and radius_km > max_km:
+        raise ValueError(f"{name} must be at most {max_km:g}")
+    return radius_km
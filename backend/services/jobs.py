@@ -0,0 +1,296 @@
+# services/jobs.py
+import http.client
+import ipaddress
+import json
+import logging
+import queue
+import socket
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class QueueFull(Exception):
+    """Raised when the job queue already holds its maximum number of waiting jobs"""
+
+
+class InvalidCallback(ValueError):
+    """Raised for a callback URL the server refuses to POST to"""
+
+
+class JobCancelled(Exception):
+    """Raised by Job.checkpoint() once the job has been cancelled"""
+
+
+def _public_addresses(host, port):
+    """
+    Resolve `host` and return its addresses, raising InvalidCallback unless
+    every one of them is public.
+    """
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)]
+    except socket.gaierror:
+        raise InvalidCallback(f"callback_url host {host} does not resolve") from None
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise InvalidCallback(f"callback_url host {host} is not a public address")
+    return list(dict.fromkeys(addresses))
+
+
+def _connect_public(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+    """
+    socket.create_connection() that resolves the host once, checks the
+    addresses and connects to those very addresses, so a DNS answer that
+    changes after the check (rebinding) cannot reach a private service.
+    """
+    host, port = address
+    error = None
+    for ip in _public_addresses(host, port):
+        try:
+            return socket.create_connection((ip, port), timeout, source_address)
+        except OSError as e:
+            error = e
+    raise error
+
+
+def validate_callback_url(url, allowed_hosts=None):
+    """
+    Check a client-supplied callback URL before anything is POSTed to it.
+    Only http(s) is accepted. With `allowed_hosts` the host must be one of
+    them; otherwise every address it resolves to must be public, so
+    callbacks cannot reach loopback, private or link-local services.
+    Raises InvalidCallback.
+    """
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port
+    except ValueError:
+        raise InvalidCallback("callback_url is not a valid URL") from None
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise InvalidCallback("callback_url must be an http or https URL")
+    host = parts.hostname.lower()
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise InvalidCallback(f"callback_url host {host} is not allowed")
+        return url
+    _public_addresses(host, port or 80)
+    return url
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # A redirect would bypass the checks made on the callback URL
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class _PublicHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _connect_public
+
+
+class _PublicHTTPSConnection(http.client.HTTPSConnection):
+    # Host header, SNI and certificate checks still use the URL's hostname
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = _connect_public
+
+
+class _PublicHTTPHandler(urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.do_open(_PublicHTTPConnection, req)
+
+
+class _PublicHTTPSHandler(urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.do_open(_PublicHTTPSConnection, req, context=self._context)
+
+
+class Job:
+    def __init__(self, kind, fn, callback_url=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.fn = fn
+        self.callback_url = callback_url
+        self.status = "queued"  # queued -> running -> succeeded | failed | cancelled
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested = threading.Event()
+
+    def checkpoint(self):
+        """Raise JobCancelled if the job was cancelled; job functions call this between stages"""
+        if self.cancel_requested.is_set():
+            raise JobCancelled()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "cancelRequested": self.cancel_requested.is_set(),
+            "result": self.result,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    Bounded local job queue served by a pool of worker threads, so long ML
+    requests (transcription, inference) never hold a web worker.
+
+    `fn(job)` runs inside `wrap` (e.g. an app context) and should call
+    `job.checkpoint()` between stages so a cancelled job stops early.
+    Finished jobs are kept for `result_ttl` seconds; if the job has a
+    callback URL (checked with validate_callback_url against
+    `callback_hosts`) its final state is POSTed there as JSON.
+    """
+
+    def __init__(self, workers=2, max_queue=100, result_ttl=600.0, callback_timeout=5.0, wrap=None,
+                 callback_hosts=None):
+        self.result_ttl = result_ttl
+        self.callback_timeout = callback_timeout
+        self.callback_hosts = {host.lower() for host in callback_hosts or ()}
+        if self.callback_hosts:
+            self._opener = urllib.request.build_opener(_NoRedirect)
+        else:
+            # Connect only to the public addresses checked at connect time; no proxy, which
+            # would resolve the host itself
+            self._opener = urllib.request.build_opener(
+                _NoRedirect, urllib.request.ProxyHandler({}), _PublicHTTPHandler, _PublicHTTPSHandler
+            )
+        self.wrap = wrap
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(max(1, int(workers)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, kind, fn, callback_url=None) -> Job:
+        """Queue fn(job). Raises InvalidCallback for a refused callback URL and QueueFull"""
+        if callback_url:
+            validate_callback_url(callback_url, self.callback_hosts)
+        self._expire()
+        job = Job(kind, fn, callback_url)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+                self.rejected += 1
+            raise QueueFull("Job queue is full")
+        return job
+
+    def get(self, job_id):
+        self._expire()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. Queued jobs never run and their callback is sent right
+        away; running jobs stay "running" with cancelRequested set until they
+        reach their next checkpoint, and end up "cancelled" with any result
+        discarded. Returns the job, or None if unknown.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_requested.set()
+        with self._lock:
+            dequeued = job.status == "queued"
+            if dequeued:
+                job.status = "cancelled"
+                job.finished_at = time.time()
+                job.fn = None
+        if dequeued and job.callback_url:
+            # Off the request thread: the POST may take up to callback_timeout
+            threading.Thread(target=self._notify, args=(job,), name=f"job-callback-{job.id}", daemon=True).start()
+        return job
+
+    def _expire(self):
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.status in FINISHED and j.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                if job.status == "cancelled":
+                    continue
+                job.status = "running"
+                job.started_at = time.time()
+            try:
+                if self.wrap is not None:
+                    with self.wrap():
+                        result = job.fn(job)
+                else:
+                    result = job.fn(job)
+            except JobCancelled:
+                status, result, error = "cancelled", None, None
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job.id, job.kind)
+                status, result, error = "failed", None, str(e)
+            else:
+                status, error = "succeeded", None
+
+            with self._lock:
+                if job.cancel_requested.is_set():
+                    status, result = "cancelled", None
+                job.status, job.result, job.error = status, result, error
+                job.finished_at = time.time()
+                job.fn = None
+                if status == "succeeded":
+                    self.completed += 1
+                elif status == "failed":
+                    self.failed += 1
+            if job.callback_url:
+                self._notify(job)
+
+    def _notify(self, job):
+        body = json.dumps(job.to_dict()).encode("utf-8")
+        request = urllib.request.Request(
+            job.callback_url, data=body, method="POST", headers={"Content-Type": "application/json"}
+        )
+        try:
+            # Without callback_hosts the opener re-checks the addresses it actually connects to
+            self._opener.open(request, timeout=self.callback_timeout).close()
+        except Exception as e:
+            logger.warning("Callback for job %s to %s failed: %s", job.id, job.callback_url, e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_status = {}
+            for job in self._jobs.values():
+                by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "workers": len(self._threads),
+            "jobs": by_status,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,154 @@
+# services/keywords.py
+import os
+import re
+import threading
+from collections import deque
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace so multi-word terms match regardless of spacing"""
+    return WHITESPACE.sub(" ", text.lower())
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a dictionary of terms. Scanning a text takes
+    time linear in its length (plus the number of matches), independent of
+    how many terms the dictionary holds. Only matches on word boundaries are
+    reported.
+
+    `entries` is an iterable of (term, value); the position of a term in it is
+    its priority (lower wins in `best`).
+    """
+
+    def __init__(self, entries):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self.size = 0
+        for priority, (term, value) in enumerate(entries):
+            term = normalize(term).strip()
+            if term:
+                self._add(term, (priority, value))
+                self.size += 1
+        self._link()
+
+    def _add(self, term, payload):
+        node = 0
+        for ch in term:
+            child = self._goto[node].get(ch)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][ch] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = child
+        self._out[node].append((len(term), payload))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def finditer(self, text):
+        """Yield (start, end, priority, value) for every whole-word match in normalized `text`"""
+        goto, fail, out = self._goto, self._fail, self._out
+        length = len(text)
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for term_length, (priority, value) in out[node]:
+                start = i - term_length + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (i + 1 == length or not text[i + 1].isalnum()):
+                    yield start, i + 1, priority, value
+
+    def best(self, text):
+        """Value of the highest-priority term found in `text`, or None"""
+        found = min(self.finditer(normalize(text)), key=lambda m: m[2], default=None)
+        return found[3] if found else None
+
+    def all(self, text):
+        """Distinct values found in `text`, in order of appearance"""
+        values = []
+        for _, _, _, value in sorted(self.finditer(normalize(text))):
+            if value not in values:
+                values.append(value)
+        return values
+
+
+def load_terms(path, default_value=None):
+    """
+    Read "term" / "term => value" lines (blank lines and # comments ignored).
+    Terms without a value map to `default_value`, or to themselves if None.
+    """
+    entries = []
+    if not path or not os.path.exists(path):
+        return entries
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            term, _, value = line.partition("=>")
+            term, value = term.strip(), value.strip()
+            entries.append((term, value or (default_value if default_value is not None else term)))
+    return entries
+
+
+class KeywordIndex:
+    """
+    The compiled emergency-type, severity and gazetteer matchers used by
+    extract_details. Built on first use and swapped atomically by `reload()`,
+    so the dictionaries can be edited without restarting the process.
+    """
+
+    def __init__(self, emergency_path, severity_path, gazetteer_path):
+        self.paths = {"emergency": emergency_path, "severity": severity_path, "gazetteer": gazetteer_path}
+        self._matchers = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        return {
+            "emergency": KeywordMatcher(load_terms(self.paths["emergency"])),
+            "severity": KeywordMatcher(load_terms(self.paths["severity"])),
+            "gazetteer": KeywordMatcher(load_terms(self.paths["gazetteer"])),
+        }
+
+    @property
+    def matchers(self):
+        if self._matchers is None:
+            with self._lock:
+                if self._matchers is None:
+                    self._matchers = self._build()
+        return self._matchers
+
+    def reload(self):
+        matchers = self._build()
+        with self._lock:
+            self._matchers = matchers
+        return self.sizes()
+
+    def sizes(self):
+        return {name: matcher.size for name, matcher in self.matchers.items()}
+
+    def emergency_type(self, text):
+        return self.matchers["emergency"].best(text)
+
+    def severity(self, text):
+        return self.matchers["severity"].best(text)
+
+    def places(self, text):
+        return self.matchers["gazetteer"].all(text)
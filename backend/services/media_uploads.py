@@ -0,0 +1,110 @@
+# services/media_uploads.py
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def spool_upload(file_storage, max_memory_bytes, chunk_size=1024 * 1024):
+    """
+    Copy an uploaded file out of the request so it can be read after the
+    response is sent. Small files stay in memory, larger ones spill to disk.
+    Returns the copy and the SHA-256 hex digest of its content.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory_bytes)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file_storage.stream.read(chunk_size), b""):
+        digest.update(chunk)
+        spool.write(chunk)
+    spool.seek(0)
+    return spool, digest.hexdigest()
+
+
+class MediaUploader:
+    """
+    Uploads the media of a report in the background, all files concurrently.
+
+    `upload(stream, folder, content_type, timeout=, digest=)` returns the
+    stored file's URL.
+    Every upload gets at most `retries` extra attempts with exponential
+    backoff and a per-attempt `timeout` (passed to `upload`). `on_uploaded`
+    is called with (report_id, field, url, digest, content_type) as each file finishes
+    (url is None if it failed for good) and `on_finished` with (report_id,
+    failed_fields) once all files of the report are done. Uploads and both
+    callbacks run in `wrap()` (e.g. an app context) on a worker thread.
+    """
+
+    def __init__(self, upload, on_uploaded, on_finished, workers=4, retries=2, backoff=1.0, timeout=60.0, wrap=None):
+        self.upload = upload
+        self.on_uploaded = on_uploaded
+        self.on_finished = on_finished
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.timeout = timeout
+        self.wrap = wrap
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="media-upload")
+        self._lock = threading.Lock()
+        self._pending = {}  # report_id -> (remaining uploads, failed fields)
+
+    def submit(self, report_id, files):
+        """
+        Start uploading `files`, a dict field -> (stream, folder, content_type,
+        digest), for the given report.
+        """
+        if not files:
+            return
+        with self._lock:
+            self._pending[report_id] = [len(files), []]
+        for field, (stream, folder, content_type, digest) in files.items():
+            self._executor.submit(self._run, report_id, field, stream, folder, content_type, digest)
+
+    def _upload_with_retries(self, stream, folder, content_type, digest):
+        for attempt in range(self.retries + 1):
+            try:
+                stream.seek(0)
+                return self.upload(stream, folder, content_type, timeout=self.timeout, digest=digest)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                logger.warning("Upload to %s failed (%s), retrying in %.1fs", folder, e, delay)
+                time.sleep(delay)
+
+    def _run(self, *args):
+        if self.wrap is not None:
+            with self.wrap():
+                self._process(*args)
+        else:
+            self._process(*args)
+
+    def _process(self, report_id, field, stream, folder, content_type, digest):
+        url = None
+        try:
+            url = self._upload_with_retries(stream, folder, content_type, digest)
+        except Exception:
+            logger.exception("Upload of %s for report %s failed", field, report_id)
+        finally:
+            stream.close()
+
+        with self._lock:
+            state = self._pending[report_id]
+            state[0] -= 1
+            if url is None:
+                state[1].append(field)
+            finished = state[0] == 0
+            if finished:
+                del self._pending[report_id]
+
+        try:
+            self._notify(report_id, field, url, digest, content_type, finished, state[1])
+        except Exception:
+            logger.exception("Recording upload of %s for report %s failed", field, report_id)
+
+    def _notify(self, report_id, field, url, digest, content_type, finished, failed_fields):
+        self.on_uploaded(report_id, field, url, digest, content_type)
+        if finished:
+            self.on_finished(report_id, failed_fields)
@@ -0,0 +1,113 @@
+# services/metrics.py
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds of the latency buckets in milliseconds
+DEFAULT_BUCKETS_MS = (
+    1, 2, 5, 10, 20, 35, 50, 75, 100, 150, 250, 400, 600, 1000, 1500, 2500, 5000, 10000, float("inf")
+)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles are interpolated within buckets"""
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(buckets_ms)
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        for i, bound in enumerate(self.bounds):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.bounds, self.counts):
+            if count and seen + count >= rank:
+                upper = bound if bound != float("inf") else self.max_ms
+                return round(lower + (upper - lower) * (rank - seen) / count, 3)
+            seen += count
+            lower = bound
+        return round(self.max_ms, 3)
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+            # Throughput of a single thread spending all its time in this stage
+            "per_second": round(self.count / (self.total_ms / 1000.0), 3) if self.total_ms else 0.0,
+        }
+
+
+class MetricsRegistry:
+    """Named latency histograms shared by the request handlers"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds * 1000.0)
+
+    @contextmanager
+    def timer(self, name):
+        """Time the enclosed block into histogram `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def reset(self, prefix=""):
+        with self._lock:
+            for name in [n for n in self._histograms if n.startswith(prefix)]:
+                del self._histograms[name]
+
+    def snapshot(self, prefix=""):
+        with self._lock:
+            return {
+                name: histogram.snapshot()
+                for name, histogram in sorted(self._histograms.items())
+                if name.startswith(prefix)
+            }
+
+    def prometheus(self, prefix=""):
+        """Render the histograms in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            items = sorted((n, h) for n, h in self._histograms.items() if n.startswith(prefix))
+            for name, histogram in items:
+                metric = "resqbridge_" + name.replace(".", "_") + "_ms"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+                lines.append(f"{metric}_sum {histogram.total_ms:.3f}")
+                lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
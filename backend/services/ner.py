@@ -0,0 +1,108 @@
+# services/ner.py
+import threading
+from collections import OrderedDict
+
+from services.batching import MicroBatcher
+
+DEFAULT_NER_MODEL = "dbmdz/bert-large-cased-finetuned-conll03-english"
+NER_BACKENDS = ("default", "quantized", "onnx")
+
+
+def build_pipeline(backend="default", model_name=DEFAULT_NER_MODEL):
+    """
+    Build a token-classification pipeline with grouped entities on CPU.
+
+      default    the full-precision PyTorch model
+      quantized  the same model with its Linear layers dynamically quantized to int8
+      onnx       the model exported to ONNX and run by ONNX Runtime (needs `optimum[onnxruntime]`)
+    """
+    from transformers import AutoModelForTokenClassification, AutoTokenizer, pipeline  # type: ignore
+
+    if backend not in NER_BACKENDS:
+        raise ValueError(f"Unknown NER backend {backend!r}; expected one of {', '.join(NER_BACKENDS)}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == "onnx":
+        try:
+            from optimum.onnxruntime import ORTModelForTokenClassification  # type: ignore
+        except ImportError as e:
+            raise ImportError("The onnx NER backend requires `pip install optimum[onnxruntime]`") from e
+        model = ORTModelForTokenClassification.from_pretrained(model_name, export=True)
+    else:
+        model = AutoModelForTokenClassification.from_pretrained(model_name)
+        model.eval()
+        if backend == "quantized":
+            import torch  # type: ignore
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    return pipeline("ner", model=model, tokenizer=tokenizer, aggregation_strategy="simple", device=-1)
+
+
+class NERService:
+    """
+    Named-entity recognition for transcripts. Concurrent calls are batched
+    into one forward pass by a MicroBatcher, and results for repeated
+    transcripts come from a bounded LRU cache.
+
+    Instances are callable like the pipeline they wrap: service(text) returns
+    the list of grouped entities.
+    """
+
+    def __init__(self, ner_pipeline, max_batch_size=16, max_wait_ms=5.0, cache_size=1024):
+        self.pipeline = ner_pipeline
+        self.cache_size = max(0, int(cache_size))
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.batcher = MicroBatcher(
+            self._run_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, name="ner-batcher"
+        )
+
+    def _run_batch(self, texts):
+        if len(texts) == 1:
+            return [self.pipeline(texts[0])]
+        return self.pipeline(texts, batch_size=len(texts))
+
+    @staticmethod
+    def _key(text):
+        return " ".join(text.split())
+
+    def __call__(self, text):
+        key = self._key(text)
+        if not key:
+            return []
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+
+        entities = self.batcher.submit(key).result()
+        if self.cache_size:
+            with self._cache_lock:
+                self._cache[key] = entities
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return entities
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            size = len(self._cache)
+        return {
+            "cache": {"size": size, "max_size": self.cache_size, "hits": self.hits, "misses": self.misses},
+            "batcher": self.batcher.stats(),
+        }
+
+
+def create_ner_service(config):
+    """Build the NER service from NER_* settings in a config mapping or object"""
+    get = config.get if isinstance(config, dict) else lambda key, default=None: getattr(config, key, default)
+    ner_pipeline = build_pipeline(get("NER_BACKEND", "default"), get("NER_MODEL", DEFAULT_NER_MODEL))
+    return NERService(
+        ner_pipeline,
+        max_batch_size=get("NER_MAX_BATCH_SIZE", 16),
+        max_wait_ms=get("NER_MAX_WAIT_MS", 5),
+        cache_size=get("NER_CACHE_SIZE", 1024),
+    )
@@ -0,0 +1,124 @@
+# services/pagination.py
+import base64
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from sqlalchemy import and_, or_
+
+
+class InvalidPage(ValueError):
+    """Raised for a malformed ?cursor= or ?limit="""
+
+
+def encode_cursor(values, direction):
+    payload = [direction, [v.isoformat() if isinstance(v, datetime) else v for v in values]]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, keys):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in ("next", "prev") or len(values) != len(keys):
+            raise ValueError
+        decoded = []
+        for (column, _), value in zip(keys, values):
+            if value is not None and column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            decoded.append(value)
+    except Exception:
+        raise InvalidPage("Invalid cursor") from None
+    return direction, decoded
+
+
+def _after(keys, values, backwards):
+    """
+    Rows strictly after `values` in the order given by `keys`, written as
+    "k1 <= v1 AND (k1 < v1 OR k2 < v2 ...)" so the leading comparison can
+    seek an index on the sort columns.
+    """
+    comparisons = []
+    for (column, descending), value in zip(keys, values):
+        before = descending != backwards
+        comparisons.append((column, value, before))
+
+    def strictly(column, value, before):
+        return column < value if before else column > value
+
+    def at_most(column, value, before):
+        return column <= value if before else column >= value
+
+    ties = []
+    for i, (column, value, before) in enumerate(comparisons):
+        ties.append(and_(*[c == v for c, v, _ in comparisons[:i]], strictly(column, value, before)))
+    first_column, first_value, first_before = comparisons[0]
+    if len(comparisons) == 1:
+        return strictly(first_column, first_value, first_before)
+    return and_(at_most(first_column, first_value, first_before), or_(*ties))
+
+
+def paginate(query, keys, cursor=None, limit=50):
+    """
+    Keyset pagination. `keys` is the list of (column, descending) that orders
+    the list and must end in a unique column (the primary key). Returns
+    (rows, next_cursor, prev_cursor); a cursor is None at that end of the list.
+    """
+    direction = "next"
+    if cursor:
+        direction, values = decode_cursor(cursor, keys)
+        query = query.filter(_after(keys, values, backwards=direction == "prev"))
+
+    backwards = direction == "prev"
+    order = []
+    for column, descending in keys:
+        order.append(column.desc() if descending != backwards else column.asc())
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    def cursor_for(row, to):
+        return encode_cursor([getattr(row, column.key) for column, _ in keys], to)
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if more or backwards:
+            next_cursor = cursor_for(rows[-1], "next")
+        if (more and backwards) or (cursor and not backwards):
+            prev_cursor = cursor_for(rows[0], "prev")
+    return rows, next_cursor, prev_cursor
+
+
+def page_headers(base_url, args, next_cursor, prev_cursor):
+    """Link (rel="next"/"prev") and X-Next-Cursor/X-Prev-Cursor headers for a page"""
+    params = {k: v for k, v in args.items() if k != "cursor"}
+    headers = {}
+    links = []
+    for rel, cursor in (("next", next_cursor), ("prev", prev_cursor)):
+        if cursor:
+            headers[f"X-{rel.capitalize()}-Cursor"] = cursor
+            links.append(f'<{base_url}?{urlencode({**params, "cursor": cursor})}>; rel="{rel}"')
+    if links:
+        headers["Link"] = ", ".join(links)
+    return headers
+
+
+def paginate_request(query, keys, args, base_url, page_size=50, max_page_size=500):
+    """
+    Page a list endpoint from its query string: ?limit= (capped at
+    `max_page_size`) and ?cursor= from a previous page; ?all=true returns
+    every row. Returns (rows, headers).
+    """
+    if args.get("all", "").lower() in ("1", "true", "yes"):
+        order = [column.desc() if descending else column.asc() for column, descending in keys]
+        return query.order_by(*order).all(), {}
+    try:
+        limit = int(args.get("limit", page_size))
+    except ValueError:
+        raise InvalidPage("limit must be an integer") from None
+    limit = max(1, min(limit, max_page_size))
+    rows, next_cursor, prev_cursor = paginate(query, keys, args.get("cursor"), limit)
+    return rows, page_headers(base_url, args, next_cursor, prev_cursor)
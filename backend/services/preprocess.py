@@ -0,0 +1,106 @@
+# services/preprocess.py
+import io
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+from PIL import Image  # type: ignore
+
+# cv2.imread flags that let the JPEG decoder scale down while decoding
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def image_dimensions(image_bytes):
+    """
+    Read (width, height) from the image header without decoding the pixels.
+    Returns None if the format is not recognised.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as im:
+            return im.size
+    except Exception:
+        return None
+
+
+def decode_for_inference(image_bytes, target_size, reduced=True):
+    """
+    Decode an image no larger than needed for a model working at `target_size`.
+
+    The largest power-of-two reduction that keeps the long side at or above
+    `target_size` is applied by the decoder itself (IMREAD_REDUCED_*), so a
+    12 MP phone photo is never materialised at full resolution.
+
+    Returns (img, full_shape) where full_shape is the (height, width) of the
+    image at full resolution, in the orientation the decoder produced. img is
+    None if the bytes could not be decoded.
+    """
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    dims = image_dimensions(image_bytes) if reduced else None
+
+    flag, factor = cv2.IMREAD_COLOR, 1
+    if dims:
+        long_side = max(dims)
+        for candidate, candidate_flag in REDUCED_DECODE_FLAGS:
+            if long_side / candidate >= target_size:
+                flag, factor = candidate_flag, candidate
+                break
+
+    img = cv2.imdecode(nparr, flag)
+    if img is None:
+        return None, None
+    if factor == 1 or not dims:
+        return img, img.shape[:2]
+
+    # EXIF orientation may have rotated the decoded image relative to the header size
+    width, height = dims
+    if (img.shape[0] > img.shape[1]) != (height > width):
+        width, height = height, width
+    return img, (height, width)
+
+
+def tile_windows(height, width, tile_size, overlap=0.2):
+    """Return (x0, y0, x1, y1) windows of at most `tile_size` covering the image with the given overlap"""
+    step = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+        for y0 in starts(height)
+        for x0 in starts(width)
+    ]
+
+
+def offset_detections(detections, dx, dy, scale=1.0):
+    """Map detections from a tile (optionally downscaled by `scale`) back into image coordinates"""
+    mapped = []
+    for det in detections:
+        coords = det.get("coordinates")
+        if coords:
+            coords = [coords[0] * scale + dx, coords[1] * scale + dy, coords[2] * scale + dx, coords[3] * scale + dy]
+        mapped.append({**det, "coordinates": coords})
+    return mapped
+
+
+def merge_detections(detections, iou_threshold=0.5):
+    """Class-wise non-maximum suppression over detections gathered from overlapping tiles"""
+    merged = []
+    by_class = {}
+    for det in detections:
+        if det.get("coordinates"):
+            by_class.setdefault(det["class"], []).append(det)
+    for dets in by_class.values():
+        boxes = [[d["coordinates"][0], d["coordinates"][1],
+                  d["coordinates"][2] - d["coordinates"][0], d["coordinates"][3] - d["coordinates"][1]] for d in dets]
+        scores = [float(d["confidence"]) for d in dets]
+        keep = cv2.dnn.NMSBoxes(boxes, scores, 0.0, iou_threshold)
+        merged.extend(dets[int(i)] for i in np.array(keep).flatten())
+    return sorted(merged, key=lambda d: d["confidence"], reverse=True)
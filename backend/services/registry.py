@@ -0,0 +1,103 @@
+# services/registry.py
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LOADING_MODES = ("lazy", "background", "eager")
+
+
+class _Entry:
+    def __init__(self, loader):
+        self.loader = loader
+        self.value = None
+        self.state = "registered"  # registered -> loading -> ready | failed
+        self.error = None
+        self.seconds = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Central place for heavy models (Vosk, the NER pipeline, the detector).
+
+    Blueprints register a loader per model when they are imported; nothing is
+    loaded at import time. `init_app(app)` then applies MODEL_LOADING:
+      lazy        load each model on first use
+      background  start loading all registered models in a thread after startup
+      eager       load everything inside create_app()
+    `get(name)` returns the model, waiting for a background load in progress
+    or loading it in the calling thread if nobody has started yet.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(loader)
+
+    def init_app(self, app):
+        mode = str(app.config.get("MODEL_LOADING", "background")).lower()
+        if mode not in LOADING_MODES:
+            raise ValueError(f"Unknown MODEL_LOADING {mode!r}; expected one of {', '.join(LOADING_MODES)}")
+        if mode == "eager":
+            with app.app_context():
+                for name in list(self._entries):
+                    self.get(name)
+        elif mode == "background":
+            threading.Thread(target=self._load_all, args=(app,), name="model-registry", daemon=True).start()
+
+    def _load_all(self, app):
+        # Loaders read their settings from current_app.config
+        with app.app_context():
+            for name in list(self._entries):
+                try:
+                    self.get(name)
+                except Exception:
+                    # Already logged and recorded in the entry's status
+                    pass
+
+    def _load(self, name, entry):
+        entry.state = "loading"
+        started = time.perf_counter()
+        try:
+            entry.value = entry.loader()
+        except Exception as e:
+            entry.state = "failed"
+            entry.error = str(e)
+            logger.exception("Failed to load model %s", name)
+            raise
+        finally:
+            entry.seconds = round(time.perf_counter() - started, 3)
+        entry.error = None
+        entry.state = "ready"
+        logger.info("Loaded model %s in %.2fs", name, entry.seconds)
+
+    def get(self, name):
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Model {name!r} is not registered")
+        if entry.state == "ready":
+            return entry.value
+        with entry.lock:
+            # Another thread may have finished loading while we waited for the lock
+            if entry.state != "ready":
+                self._load(name, entry)
+        return entry.value
+
+    def ready(self, name) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.state == "ready"
+
+    def status(self) -> dict:
+        return {
+            name: {"state": entry.state, "load_seconds": entry.seconds, "error": entry.error}
+            for name, entry in self._entries.items()
+        }
+
+
+registry = ModelRegistry()
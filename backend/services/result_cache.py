@@ -0,0 +1,165 @@
+# services/result_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 of the encoded image bytes; identical uploads share this key"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def dhash(img, hash_size=8) -> int:
+    """
+    Difference hash of a decoded BGR image. Visually similar images (re-encoded,
+    resized, slightly cropped screenshots of the same photo) end up a small
+    Hamming distance apart.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ResultCache:
+    """
+    Bounded LRU + TTL cache of detection results keyed on the exact content
+    hash of an upload, with a fallback lookup on the perceptual hash of the
+    decoded image for near-duplicates.
+
+    Values are stored together with the (height, width) of the image they were
+    computed on so callers can rescale coordinates for a near-duplicate of a
+    different size, and with the detection mode (e.g. "tiled" or "full") so a
+    near-duplicate lookup never returns a result computed the other way.
+
+    Near-duplicate lookups don't scan every entry: the 64-bit perceptual hash
+    is split into `max_distance + 1` bands and each entry is indexed under
+    every band. Two hashes within `max_distance` bits must agree exactly on at
+    least one band, so only entries sharing a band are compared.
+    """
+
+    HASH_BITS = 64
+
+    def __init__(self, max_size=512, ttl_seconds=600.0, max_distance=4):
+        self.max_size = max(0, int(max_size))  # 0 disables caching
+        self.ttl = float(ttl_seconds)
+        self.max_distance = max(0, min(int(max_distance), self.HASH_BITS - 1))
+        self._entries = OrderedDict()  # content key -> (perceptual hash, shape, value, stored_at, mode)
+        self._bands = self._band_masks(self.max_distance + 1)
+        self._index = {}  # (mode, band, phash & band mask) -> set of content keys
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def _band_masks(cls, count):
+        """Bit masks splitting a HASH_BITS-bit hash into `count` contiguous bands"""
+        masks, start = [], 0
+        for band in range(count):
+            width = cls.HASH_BITS // count + (1 if band < cls.HASH_BITS % count else 0)
+            masks.append(((1 << width) - 1) << start)
+            start += width
+        return masks
+
+    def _index_keys(self, mode, phash):
+        return [(mode, band, phash & mask) for band, mask in enumerate(self._bands)]
+
+    def _remove(self, key):
+        """Drop an entry and its index slots; the caller holds the lock"""
+        phash, _, _, _, mode = self._entries.pop(key)
+        for slot in self._index_keys(mode, phash):
+            keys = self._index.get(slot)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[slot]
+
+    def _expired(self, stored_at, now):
+        return self.ttl > 0 and now - stored_at > self.ttl
+
+    def get_exact(self, key):
+        """Return (shape, value) for an identical upload, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry[3], now):
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry[1], entry[2]
+
+    def get_similar(self, phash, mode=""):
+        """
+        Return (shape, value) for the closest cached image of the same `mode`
+        within `max_distance` bits of `phash`, or None. Counts a miss when
+        nothing qualifies.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = set()
+            for slot in self._index_keys(mode, phash):
+                candidates.update(self._index.get(slot, ()))
+            best_key, best_distance = None, self.max_distance + 1
+            for key in candidates:
+                other, _, _, stored_at, _ = self._entries[key]
+                if self._expired(stored_at, now):
+                    self._remove(key)
+                    self.expirations += 1
+                    continue
+                distance = hamming(phash, other)
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.near_hits += 1
+            _, shape, value, _, _ = self._entries[best_key]
+            return shape, value
+
+    def put(self, key, phash, shape, value, mode=""):
+        if self.max_size == 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (phash, tuple(shape[:2]), value, time.monotonic(), mode)
+            for slot in self._index_keys(mode, phash):
+                self._index.setdefault(slot, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+            exact_hits, near_hits, misses = self.exact_hits, self.near_hits, self.misses
+            evictions, expirations = self.evictions, self.expirations
+        lookups = exact_hits + near_hits + misses
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "max_distance": self.max_distance,
+            "exact_hits": exact_hits,
+            "near_hits": near_hits,
+            "misses": misses,
+            "hit_rate": round((exact_hits + near_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": evictions,
+            "expirations": expirations,
+        }
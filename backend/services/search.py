@@ -0,0 +1,128 @@
+# services/search.py
+import re
+from datetime import datetime
+
+from sqlalchemy import Integer, and_, or_, text
+
+# Table -> (FTS5 table, indexed text columns). The FTS tables are external
+# content tables over the base table, kept in sync by triggers.
+FTS_TABLES = {
+    "incidents": ("incidents_fts", ("title", "description")),
+    "sos_reports": ("sos_reports_fts", ("title",)),
+}
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_fts_available = {}
+
+
+def fts_ddl(table):
+    """Statements creating the FTS5 table of `table`, its sync triggers, and indexing existing rows"""
+    fts, columns = FTS_TABLES[table]
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def fts_drop_ddl(table):
+    fts, _ = FTS_TABLES[table]
+    return [f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ("ai", "ad", "au")] + [f"DROP TABLE IF EXISTS {fts}"]
+
+
+def create_fts(connection):
+    """Create every FTS table (SQLite only); safe to run more than once"""
+    if connection.dialect.name != "sqlite":
+        return
+    for table in FTS_TABLES:
+        for statement in fts_ddl(table):
+            connection.execute(text(statement))
+    _fts_available.clear()
+
+
+def fts_available(session, table):
+    """Whether the FTS table of `table` exists in this database (checked once per engine)"""
+    bind = session.get_bind()
+    key = (str(bind.url), table)
+    if key not in _fts_available:
+        if bind.dialect.name != "sqlite":
+            _fts_available[key] = False
+        else:
+            found = session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLES[table][0]},
+            ).first()
+            _fts_available[key] = found is not None
+    return _fts_available[key]
+
+
+def fts_query(q):
+    """
+    A safe FTS5 MATCH expression for free text: every word must appear, the
+    last one as a prefix (so results show up while typing). None if q has
+    no words.
+    """
+    tokens = _TOKEN.findall(q or "")
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def text_filter(session, model, q):
+    """Condition matching rows of `model` whose indexed text contains `q`"""
+    table = model.__tablename__
+    fts, columns = FTS_TABLES[table]
+    if fts_available(session, table):
+        match = fts_query(q)
+        if match is None:
+            return None
+        rowids = text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :match").bindparams(match=match)
+        return model.id.in_(rowids.columns(rowid=Integer))
+    # Without FTS5 (another database, or the migration not applied yet) fall back to LIKE
+    words = _TOKEN.findall(q or "")
+    if not words:
+        return None
+    return and_(*[or_(*[getattr(model, c).ilike(f"%{word}%") for c in columns]) for word in words])
+
+
+def parse_date(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date or timestamp") from None
+
+
+def apply_filters(session, query, model, args, date_column):
+    """
+    Narrow a list query by ?status=, ?from= / ?to= (on `date_column`,
+    inclusive) and ?q= (full-text search). Raises ValueError for bad values.
+    """
+    statuses = [s.strip() for s in args.get("status", "").split(",") if s.strip()]
+    if len(statuses) == 1:
+        # Equality rather than IN, so the (status, date, id) index also gives the order
+        query = query.filter(model.status == statuses[0])
+    elif statuses:
+        query = query.filter(model.status.in_(statuses))
+    if args.get("from"):
+        query = query.filter(date_column >= parse_date(args["from"], "from"))
+    if args.get("to"):
+        to = parse_date(args["to"], "to")
+        if len(args["to"]) == 10:  # a bare date includes the whole day
+            to = to.replace(hour=23, minute=59, second=59, microsecond=999999)
+        query = query.filter(date_column <= to)
+    if args.get("q"):
+        condition = text_filter(session, model, args["q"])
+        if condition is not None:
+            query = query.filter(condition)
+    return query
@@ -0,0 +1,234 @@
+# services/storage.py
+import abc
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Cloudinary's chunked upload API needs chunks of at least 5 MB
+DEFAULT_CHUNK_SIZE = 6 * 1024 * 1024
+STORAGE_BACKENDS = ("cloudinary", "local")
+
+
+def hash_stream(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """SHA-256 hex digest of a seekable stream, read in chunks; rewinds the stream"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class MediaStorage(abc.ABC):
+    """
+    Content-addressed media storage. Every file is stored under
+    "<folder>/<sha256 of its content>", so uploading the same bytes again
+    returns the existing URL instead of storing a second copy.
+
+    Backends implement `lookup(key, content_type)` (URL of an already stored
+    key, or None) and `write(stream, key, content_type, timeout)` (store the
+    stream, read in `chunk_size` pieces, and return its URL). Before asking
+    the backend, keys are looked up in a bounded in-process index and then
+    with `find_url(key)` (e.g. a table of stored uploads), if given.
+    """
+
+    name = None
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, index_size=4096, find_url=None):
+        self.chunk_size = max(64 * 1024, int(chunk_size))
+        self.index_size = max(0, int(index_size))
+        self.find_url = find_url
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.deduplicated = 0
+
+    @staticmethod
+    def make_key(folder, digest):
+        return f"{folder}/{digest}"
+
+    def known_url(self, folder, digest):
+        """URL of content already stored in `folder` according to the index or `find_url`, or None"""
+        key = self.make_key(folder, digest)
+        with self._lock:
+            url = self._index.get(key)
+            if url is not None:
+                self._index.move_to_end(key)
+                self.deduplicated += 1
+                return url
+        if self.find_url is not None:
+            url = self.find_url(key)
+            if url is not None:
+                with self._lock:
+                    self.deduplicated += 1
+                self._remember(key, url)
+        return url
+
+    def _remember(self, key, url):
+        if not self.index_size:
+            return
+        with self._lock:
+            self._index[key] = url
+            while len(self._index) > self.index_size:
+                self._index.popitem(last=False)
+
+    def save(self, stream, folder, content_type=None, timeout=None, digest=None):
+        """Store a seekable stream (unless its content is already stored) and return its URL"""
+        digest = digest or hash_stream(stream, self.chunk_size)
+        url = self.known_url(folder, digest)
+        if url is not None:
+            return url
+
+        key = self.make_key(folder, digest)
+        url = self.lookup(key, content_type)
+        if url is not None:
+            with self._lock:
+                self.deduplicated += 1
+        else:
+            stream.seek(0)
+            url = self.write(stream, key, content_type, timeout)
+            with self._lock:
+                self.stored += 1
+        self._remember(key, url)
+        return url
+
+    @abc.abstractmethod
+    def lookup(self, key, content_type):
+        """URL of `key` if the backend already holds it, else None"""
+
+    @abc.abstractmethod
+    def write(self, stream, key, content_type, timeout):
+        """Store `stream` under `key` and return its URL"""
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "stored": self.stored,
+                "deduplicated": self.deduplicated,
+                "index_size": len(self._index),
+            }
+
+
+class LocalStorage(MediaStorage):
+    """
+    Media stored as files under `root`, served from `base_url`. Useful for
+    development and tests, or behind a reverse proxy on a single host.
+
+    Files are named by their key alone, so the same bytes are stored once
+    whatever MIME type they were uploaded with; the type is kept by the
+    caller (see StoredMedia.content_type) for serving.
+    """
+
+    name = "local"
+
+    def __init__(self, root, base_url="/media", **kwargs):
+        super().__init__(**kwargs)
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path_for(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise ValueError(f"Invalid media key {key!r}")
+        return path
+
+    def lookup(self, key, content_type):
+        if os.path.exists(self.path_for(key)):
+            return f"{self.base_url}/{key}"
+        return None
+
+    def write(self, stream, key, content_type, timeout):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so a half-written file is never served
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+                    out.write(chunk)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return f"{self.base_url}/{key}"
+
+
+class CloudinaryStorage(MediaStorage):
+    """
+    Media stored on Cloudinary (credentials from cloudinary.config()), sent
+    with the chunked upload API. The SHA-256 is used as the public id.
+
+    The Admin API used by `lookup` is rate limited, so it is only asked when
+    `remote_lookup` is set; otherwise content unknown to `find_url` is simply
+    uploaded (with overwrite off, an existing public id is kept as is).
+    """
+
+    name = "cloudinary"
+
+    def __init__(self, remote_lookup=False, **kwargs):
+        super().__init__(**kwargs)
+        self.remote_lookup = remote_lookup
+
+    @staticmethod
+    def resource_type(content_type):
+        content_type = content_type or ""
+        if content_type.startswith("audio/"):
+            return "video"  # Cloudinary stores audio as a video resource
+        if content_type.startswith("video/"):
+            return "video"
+        return "image"
+
+    def lookup(self, key, content_type):
+        if not self.remote_lookup:
+            return None
+        import cloudinary.api  # type: ignore
+        from cloudinary.exceptions import NotFound  # type: ignore
+
+        try:
+            resource = cloudinary.api.resource(key, resource_type=self.resource_type(content_type))
+        except NotFound:
+            return None
+        except Exception as e:
+            logger.warning("Cloudinary lookup of %s failed, uploading instead: %s", key, e)
+            return None
+        return resource.get("secure_url")
+
+    def write(self, stream, key, content_type, timeout):
+        import cloudinary.uploader  # type: ignore
+
+        options = {
+            "public_id": key,
+            "resource_type": self.resource_type(content_type),
+            "chunk_size": self.chunk_size,
+            "overwrite": False,
+        }
+        if timeout:
+            options["timeout"] = timeout
+        response = cloudinary.uploader.upload_large(stream, **options)
+        return response["secure_url"]
+
+
+def create_storage(config, find_url=None):
+    """
+    Build the media storage from MEDIA_* settings in a config mapping or
+    object; `find_url(key)` is passed on to the backend.
+    """
+    get = config.get if isinstance(config, dict) else lambda key, default=None: getattr(config, key, default)
+    backend = get("MEDIA_STORAGE", "cloudinary")
+    options = {
+        "chunk_size": get("MEDIA_CHUNK_SIZE", DEFAULT_CHUNK_SIZE),
+        "index_size": get("MEDIA_INDEX_SIZE", 4096),
+        "find_url": find_url,
+    }
+    if backend == "local":
+        return LocalStorage(get("MEDIA_LOCAL_DIR", "media"), get("MEDIA_LOCAL_URL", "/media"), **options)
+    if backend == "cloudinary":
+        return CloudinaryStorage(remote_lookup=get("MEDIA_REMOTE_LOOKUP", False), **options)
+    raise ValueError(f"Unknown media storage {backend!r}; expected one of {', '.join(STORAGE_BACKENDS)}")
@@ -0,0 +1,103 @@
+# services/streaming_asr.py
+import json
+import threading
+import time
+import uuid
+
+from vosk import KaldiRecognizer  # type: ignore
+
+from services.audio import iter_pcm_chunks
+
+
+class TranscriptionSession:
+    """
+    One live call: a KaldiRecognizer fed with 16-bit mono PCM as it arrives.
+    `on_final(text)` is applied to every finalized utterance (e.g. to extract
+    location and emergency type) and its return value is reported.
+    """
+
+    def __init__(self, session_id, model, sample_rate, on_final):
+        self.id = session_id
+        self.sample_rate = sample_rate
+        self.on_final = on_final
+        self.recognizer = KaldiRecognizer(model, sample_rate)
+        self.utterances = []
+        self.last_partial = ""
+        self.last_active = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _finalize(self, result_json):
+        text = json.loads(result_json).get("text", "")
+        if not text:
+            return None
+        utterance = {"index": len(self.utterances), "text": text}
+        if self.on_final is not None:
+            utterance["details"] = self.on_final(text)
+        self.utterances.append(utterance)
+        return utterance
+
+    def feed(self, pcm: bytes):
+        """
+        Feed a chunk of PCM. Returns a list of events: {"final": utterance} for
+        every utterance completed by this chunk, then {"partial": text} if the
+        in-progress hypothesis changed.
+        """
+        events = []
+        with self.lock:
+            self.last_active = time.monotonic()
+            for data in iter_pcm_chunks(pcm, 2):
+                if self.recognizer.AcceptWaveform(data):
+                    utterance = self._finalize(self.recognizer.Result())
+                    self.last_partial = ""
+                    if utterance:
+                        events.append({"final": utterance})
+            partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+            if partial != self.last_partial:
+                self.last_partial = partial
+                events.append({"partial": partial})
+        return events
+
+    def finish(self):
+        """Flush the recognizer; returns the last utterance (or None) and the full transcript"""
+        with self.lock:
+            utterance = self._finalize(self.recognizer.FinalResult())
+            transcript = " ".join(u["text"] for u in self.utterances).strip()
+        return utterance, transcript
+
+
+class SessionManager:
+    """Live transcription sessions by id; sessions idle for `idle_timeout` seconds are dropped"""
+
+    def __init__(self, idle_timeout=120.0, max_sessions=100):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_active > self.idle_timeout:
+                del self._sessions[session_id]
+
+    def create(self, model, sample_rate, on_final):
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                raise RuntimeError("Too many active transcription sessions")
+            session = TranscriptionSession(uuid.uuid4().hex, model, sample_rate, on_final)
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            self._expire()
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def count(self):
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,118 @@
+# services/sync.py
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from models import db, Tombstone
+
+
+class InvalidSince(ValueError):
+    """Raised for a ?since= value that is not a timestamp"""
+
+
+class SinceExpired(ValueError):
+    """Raised when ?since= is older than the tombstones kept, so deletions may be missing"""
+
+
+def parse_since(value):
+    """?since= as a naive UTC datetime: ISO 8601 (as returned in "since") or epoch seconds"""
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        try:
+            return datetime.utcfromtimestamp(seconds)
+        except (ValueError, OverflowError, OSError):
+            raise InvalidSince("since is out of range") from None
+    try:
+        since = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise InvalidSince("since must be an ISO 8601 timestamp or epoch seconds") from None
+    if since.tzinfo is not None:
+        since = (since - since.utcoffset()).replace(tzinfo=None)
+    return since
+
+
+def record_tombstone(entity, entity_id, retention_days=30):
+    """
+    Add a tombstone for a deleted row to the current session (committed with
+    the delete) and drop tombstones older than `retention_days`.
+    """
+    now = datetime.utcnow()
+    db.session.add(Tombstone(entity=entity, entity_id=entity_id, deleted_at=now))
+    Tombstone.query.filter(Tombstone.deleted_at < now - timedelta(days=retention_days)).delete(
+        synchronize_session=False
+    )
+
+
+def list_etag(model, stamp_column, entity, args=None):
+    """
+    Weak ETag of a list: changes whenever a row is inserted (max id), changed
+    (max change stamp) or deleted (newest tombstone), and with the query
+    string. Each part is a single index lookup, so no rows are read.
+    """
+    # Separate queries: SQLite answers a lone MIN/MAX from the index, but not two in one SELECT
+    max_id = db.session.query(func.max(model.id)).scalar()
+    max_stamp = db.session.query(func.max(stamp_column)).scalar()
+    last_deleted = db.session.query(func.max(Tombstone.id)).filter(Tombstone.entity == entity).scalar()
+    query = "&".join(f"{k}={v}" for k, v in sorted((args or {}).items()))
+    fingerprint = f"{entity}|{max_id}|{max_stamp}|{last_deleted}|{query}"
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+
+
+def changes_since(query, stamp_column, entity, since, retention_days=30, skew_seconds=2):
+    """
+    Rows created or changed after `since` (oldest change first) and the ids
+    deleted since then. Returns (rows, deleted_ids, next_since); pass
+    next_since as the following ?since=. It lags the current time by
+    `skew_seconds` so rows committed during the query are not skipped, which
+    means a row may be returned twice.
+    """
+    now = datetime.utcnow()
+    if since < now - timedelta(days=retention_days):
+        raise SinceExpired("since is older than the deletion history kept; reload the full list")
+    rows = query.filter(stamp_column > since).order_by(stamp_column.asc()).all()
+    deleted_ids = [
+        entity_id
+        for (entity_id,) in db.session.query(Tombstone.entity_id)
+        .filter(Tombstone.entity == entity, Tombstone.deleted_at > since)
+        .order_by(Tombstone.deleted_at.asc())
+    ]
+    next_since = max(since, now - timedelta(seconds=skew_seconds))
+    return rows, deleted_ids, next_since
+
+
+def not_modified(etag):
+    """A 304 response if the request's If-None-Match matches `etag`, else None"""
+    from flask import request
+
+    if request.if_none_match.contains_weak(etag):
+        return "", 304, {"ETag": f'W/"{etag}"'}
+    return None
+
+
+def delta_response(query, stamp_column, entity, serialize, etag):
+    """
+    Response for ?since=: {"items": changed rows, "deleted": ids, "since":
+    value for the next request}.
+    """
+    from flask import request, jsonify, current_app
+
+    config = current_app.config
+    try:
+        rows, deleted_ids, next_since = changes_since(
+            query,
+            stamp_column,
+            entity,
+            parse_since(request.args["since"]),
+            config.get("TOMBSTONE_RETENTION_DAYS", 30),
+            config.get("SYNC_SKEW_SECONDS", 2),
+        )
+    except InvalidSince as e:
+        return jsonify({"error": str(e)}), 400
+    except SinceExpired as e:
+        return jsonify({"error": str(e)}), 410
+    body = {"items": [serialize(row) for row in rows], "deleted": deleted_ids, "since": next_since.isoformat()}
+    return jsonify(body), 200, {"ETag": f'W/"{etag}"'}
@@ -0,0 +1,178 @@
+# services/video.py
+import time
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+
+JPEG_START = b"\xff\xd8"
+
+
+class FrameSampler:
+    """
+    Decides which frames of a stream are worth running through the detector.
+
+    Frames are sampled every `1 / sample_fps` seconds of stream time. A sampled
+    frame that barely differs from the last analyzed one (mean absolute
+    difference of small grayscale thumbnails below `diff_threshold`) is
+    skipped and the sampling interval doubles, up to `max_interval` seconds;
+    as soon as the scene changes the interval drops back to the base rate.
+    """
+
+    def __init__(self, sample_fps=2.0, max_interval=2.0, diff_threshold=4.0, thumb_size=(64, 36)):
+        self.base_interval = 1.0 / max(sample_fps, 1e-3)
+        self.max_interval = max(max_interval, self.base_interval)
+        self.diff_threshold = diff_threshold
+        self.thumb_size = thumb_size
+        self.interval = self.base_interval
+        self.next_time = 0.0
+        self._last_thumb = None
+        self.skipped_static = 0
+
+    def due(self, timestamp) -> bool:
+        """Whether the frame at `timestamp` seconds should be decoded and inspected"""
+        return timestamp >= self.next_time
+
+    def accept(self, frame, timestamp) -> bool:
+        """
+        Inspect a due frame; returns True if it changed enough to be analyzed.
+        Always schedules the next due time.
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        thumb = cv2.resize(gray, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+        changed = self._last_thumb is None or float(np.mean(np.abs(thumb - self._last_thumb))) >= self.diff_threshold
+        if changed:
+            self._last_thumb = thumb
+            self.interval = self.base_interval
+        else:
+            self.skipped_static += 1
+            self.interval = min(self.interval * 2, self.max_interval)
+        self.next_time = timestamp + self.interval
+        return changed
+
+
+def iter_video_frames(path, sampler):
+    """
+    Yield (index, timestamp_seconds, frame) for the frames of a video file that
+    the sampler selects. Frames that are not due are only grabbed, never
+    decoded, so a single frame is held in memory at a time.
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError("Could not open video")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        index = -1
+        while capture.grab():
+            index += 1
+            timestamp = index / fps
+            if not sampler.due(timestamp):
+                continue
+            ok, frame = capture.retrieve()
+            if ok and sampler.accept(frame, timestamp):
+                yield index, timestamp, frame
+    finally:
+        capture.release()
+
+
+def _scan_jpeg(buffer, pos, entropy):
+    """
+    Walk the marker segments of the JPEG at the start of `buffer` from `pos`
+    (2, just past the start marker, or where an earlier call stopped).
+    Segments are skipped by their length, so markers inside them, such as
+    the end marker of an EXIF thumbnail in APP1, do not end the image.
+
+    Returns (end, pos, entropy): `end` is the offset just past the end
+    marker, or None if more data is needed, in which case call again with
+    the returned pos and entropy once the buffer has grown. Raises
+    ValueError if the bytes are not a JPEG.
+    """
+    n = len(buffer)
+    while True:
+        if entropy:
+            # Entropy-coded data runs to the next marker; FF00 (stuffed byte),
+            # restart markers and FF fill bytes do not end it
+            if pos > n:
+                return None, pos, True
+            ff = buffer.find(b"\xff", pos)
+            while ff >= 0 and ff + 1 < n and (buffer[ff + 1] == 0x00 or buffer[ff + 1] == 0xFF
+                                               or 0xD0 <= buffer[ff + 1] <= 0xD7):
+                ff = buffer.find(b"\xff", ff + 1)
+            if ff < 0:
+                return None, n, True
+            if ff + 1 >= n:
+                return None, ff, True
+            pos, entropy = ff, False
+
+        if pos + 2 > n:
+            return None, pos, False
+        if buffer[pos] != 0xFF:
+            raise ValueError("Malformed JPEG")
+        marker = buffer[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+        elif marker == 0xD9:  # end of image
+            return pos + 2, pos, False
+        elif marker == 0x01 or 0xD0 <= marker <= 0xD7:  # markers without a length
+            pos += 2
+        else:
+            if pos + 4 > n:
+                return None, pos, False
+            length = (buffer[pos + 2] << 8) | buffer[pos + 3]
+            if length < 2:
+                raise ValueError("Malformed JPEG")
+            pos += 2 + length
+            entropy = marker == 0xDA  # start of scan
+
+
+def iter_mjpeg_frames(stream, sampler, chunk_size=64 * 1024, max_frame_bytes=8 * 1024 * 1024):
+    """
+    Yield (index, timestamp_seconds, frame) from a chunked MJPEG body (either
+    multipart/x-mixed-replace parts or back-to-back JPEGs) as the bytes arrive.
+    Each frame starts at a JPEG start marker and ends at the end marker found
+    by walking its segments (see _scan_jpeg), so embedded thumbnails do not
+    cut it short; frames that are not due are dropped without decoding.
+    Timestamps are seconds since the first byte.
+    """
+    started = time.monotonic()
+    buffer = bytearray()
+    index = -1
+    scan = None  # (pos, entropy) of the partly received frame at the start of the buffer
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+
+        while True:
+            if scan is None:
+                start = buffer.find(JPEG_START)
+                if start < 0:
+                    # Keep a possible half marker at the end of the buffer
+                    del buffer[:-1]
+                    break
+                del buffer[:start]
+                scan = (2, False)
+            try:
+                end, pos, entropy = _scan_jpeg(buffer, *scan)
+            except ValueError:
+                # Not a JPEG after all; look for the next start marker
+                del buffer[:2]
+                scan = None
+                continue
+            if end is None:
+                scan = (pos, entropy)
+                if len(buffer) > max_frame_bytes:
+                    raise ValueError("MJPEG frame exceeds the maximum frame size")
+                break
+
+            jpeg = bytes(buffer[:end])
+            del buffer[:end]
+            scan = None
+            index += 1
+            timestamp = time.monotonic() - started
+            if not sampler.due(timestamp):
+                continue
+            frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            if frame is not None and sampler.accept(frame, timestamp):
+                yield index, timestamp, frame
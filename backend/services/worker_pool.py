@@ -0,0 +1,286 @@
+# services/worker_pool.py
+import itertools
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Settings forwarded from app.config to every worker's DetectorLifecycle
+DETECTOR_SETTINGS = (
+    "PREDICT_MODEL_PATH",
+    "PREDICT_IMGSZ",
+    "PREDICT_WARMUP_RUNS",
+    "PREDICT_INTRA_OP_THREADS",
+    "PREDICT_INTER_OP_THREADS",
+    "PREDICT_GRAPH_OPT_LEVEL",
+)
+
+# Longest wait before restarting a worker that keeps failing
+MAX_RESTART_BACKOFF = 60.0
+
+
+class WorkersUnavailable(RuntimeError):
+    """Raised by submit() when no worker has loaded its model yet (or all of them have failed)"""
+
+
+def _worker_main(worker_id, tasks, results, settings):
+    """
+    Entry point of an inference worker process. Loads its own copy of the
+    detector, then serves (job_id, shm_name, shape, dtype) tasks until it
+    receives None. Frames are read straight from shared memory; only the
+    small detection lists travel back through the results queue.
+    """
+    from services.detector import DetectorLifecycle, extract_detections
+
+    det = DetectorLifecycle()
+    try:
+        det.configure(settings)
+        model = det.get()
+    except Exception as e:
+        results.put(("failed", worker_id, None, str(e)))
+        return
+    results.put(("ready", worker_id, None, None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, shm_name, shape, dtype = task
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                img = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                result = model(img, imgsz=det.imgsz, conf=0.25, save=False, verbose=False)[0]
+                detections = extract_detections(result)
+                del img
+            finally:
+                shm.close()
+            results.put(("result", worker_id, job_id, detections))
+        except Exception as e:
+            results.put(("error", worker_id, job_id, str(e)))
+
+
+class _Worker:
+    def __init__(self, worker_id, process, tasks):
+        self.id = worker_id
+        self.process = process
+        self.tasks = tasks
+        self.ready = False
+        self.inflight = {}  # job_id -> dispatch time (start time for the oldest job)
+        self.restarts = 0
+        self.completed = 0
+        self.failures = 0  # exits and timeouts since the worker was last ready
+        self.restart_at = None  # when the monitor respawns this exited worker
+        self.gave_up = False
+
+
+class InferenceWorkerPool:
+    """
+    Pool of inference worker processes, each holding its own detector copy, so
+    predict throughput scales with CPU cores instead of one GIL-bound process.
+
+    Decoded frames are copied once into a `multiprocessing.shared_memory`
+    block whose name is sent to the least busy ready worker; nothing is
+    pickled but the block name, the shape and the detections coming back.
+    While no worker is ready, submit() raises WorkersUnavailable instead of
+    queueing. A monitor thread restarts workers that die and kills workers
+    stuck on one job longer than PREDICT_WORKER_TIMEOUT seconds; jobs in
+    flight on such a worker fail. Restarts back off exponentially, and a slot
+    that fails PREDICT_WORKER_MAX_RESTARTS times in a row without becoming
+    ready (e.g. a model that cannot load) is left down.
+
+    Configured through `init_app(app)`:
+      PREDICT_WORKERS                 number of worker processes (0 disables the pool)
+      PREDICT_WORKER_TIMEOUT          seconds a single job may run before the worker is restarted
+      PREDICT_HEALTH_INTERVAL         seconds between health checks
+      PREDICT_WORKER_MAX_RESTARTS     consecutive failed restarts before a slot is given up
+      PREDICT_WORKER_RESTART_BACKOFF  seconds before the first restart, doubling after each failure
+    """
+
+    def __init__(self):
+        self.started = False
+        self.num_workers = 0
+        self.timeout = 30.0
+        self.health_interval = 1.0
+        self.max_restarts = 5
+        self.restart_backoff = 1.0
+        self._ctx = multiprocessing.get_context("spawn")
+        self._settings = {}
+        self._workers = []
+        self._jobs = {}  # job_id -> (future, shared memory block, worker)
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._results = None
+
+    def init_app(self, app):
+        self.num_workers = int(app.config.get("PREDICT_WORKERS", 0))
+        self.timeout = float(app.config.get("PREDICT_WORKER_TIMEOUT", 30))
+        self.health_interval = float(app.config.get("PREDICT_HEALTH_INTERVAL", 1))
+        self.max_restarts = int(app.config.get("PREDICT_WORKER_MAX_RESTARTS", 5))
+        self.restart_backoff = float(app.config.get("PREDICT_WORKER_RESTART_BACKOFF", 1))
+        self._settings = {key: app.config.get(key) for key in DETECTOR_SETTINGS if app.config.get(key) is not None}
+        if self.num_workers > 0:
+            self.start()
+
+    def start(self):
+        if self.started:
+            return
+        self._results = self._ctx.Queue()
+        self._workers = [self._spawn(i) for i in range(self.num_workers)]
+        threading.Thread(target=self._collect, name="predict-pool-results", daemon=True).start()
+        threading.Thread(target=self._monitor, name="predict-pool-monitor", daemon=True).start()
+        self.started = True
+
+    def _spawn(self, worker_id, previous=None):
+        tasks = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, tasks, self._results, self._settings),
+            name=f"predict-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        worker = _Worker(worker_id, process, tasks)
+        if previous is not None:
+            worker.restarts = previous.restarts + 1
+            worker.completed = previous.completed
+            worker.failures = previous.failures
+        return worker
+
+    def _ready_workers(self):
+        return [w for w in self._workers if w.ready and w.process.is_alive()]
+
+    def submit(self, img) -> Future:
+        """
+        Send a decoded frame to the least busy ready worker; the Future
+        resolves to its detections. Raises WorkersUnavailable if no worker is
+        ready, so callers can answer 503 instead of waiting on a dead queue.
+        """
+        with self._lock:
+            if not self._ready_workers():
+                raise WorkersUnavailable("No inference worker is ready")
+        img = np.ascontiguousarray(img)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, img.nbytes))
+        np.ndarray(img.shape, dtype=img.dtype, buffer=shm.buf)[...] = img
+
+        future = Future()
+        with self._lock:
+            candidates = self._ready_workers()
+            if not candidates:
+                shm.close()
+                shm.unlink()
+                raise WorkersUnavailable("No inference worker is ready")
+            worker = min(candidates, key=lambda w: len(w.inflight))
+            job_id = next(self._job_ids)
+            self._jobs[job_id] = (future, shm, worker)
+            worker.inflight[job_id] = time.monotonic()
+            worker.tasks.put((job_id, shm.name, img.shape, img.dtype.str))
+        return future
+
+    def _finish(self, job_id, result=None, error=None):
+        with self._lock:
+            entry = self._jobs.pop(job_id, None)
+            if entry is None:
+                return
+            future, shm, worker = entry
+            worker.inflight.pop(job_id, None)
+            worker.completed += 1
+            # Workers run jobs in FIFO order; the next one starts now
+            for next_job in worker.inflight:
+                worker.inflight[next_job] = time.monotonic()
+                break
+        shm.close()
+        shm.unlink()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _collect(self):
+        while True:
+            kind, worker_id, job_id, payload = self._results.get()
+            if kind == "result":
+                self._finish(job_id, result=payload)
+            elif kind == "error":
+                self._finish(job_id, error=RuntimeError(payload))
+            elif kind == "ready":
+                with self._lock:
+                    self._workers[worker_id].ready = True
+                    self._workers[worker_id].failures = 0
+                logger.info("Inference worker %d ready", worker_id)
+            elif kind == "failed":
+                logger.error("Inference worker %d failed to load the model: %s", worker_id, payload)
+
+    def _monitor(self):
+        while True:
+            time.sleep(self.health_interval)
+            now = time.monotonic()
+            for worker_id in range(len(self._workers)):
+                worker = self._workers[worker_id]
+                if worker.gave_up:
+                    continue
+                if worker.restart_at is not None:
+                    if now >= worker.restart_at:
+                        with self._lock:
+                            self._workers[worker_id] = self._spawn(worker_id, previous=worker)
+                    continue
+
+                oldest = next(iter(list(worker.inflight.values())), None)
+                stuck = oldest is not None and now - oldest > self.timeout
+                if worker.process.is_alive() and not stuck:
+                    continue
+
+                if stuck:
+                    logger.warning("Inference worker %d exceeded %.0fs on a job", worker_id, self.timeout)
+                    worker.process.kill()
+                else:
+                    logger.warning("Inference worker %d exited with code %s", worker_id, worker.process.exitcode)
+                worker.process.join(timeout=5)
+
+                with self._lock:
+                    worker.ready = False
+                    lost = list(worker.inflight)
+                for job_id in lost:
+                    self._finish(job_id, error=RuntimeError(f"Inference worker {worker_id} crashed"))
+
+                worker.failures += 1
+                if worker.failures > self.max_restarts:
+                    worker.gave_up = True
+                    logger.error("Inference worker %d failed %d times in a row, not restarting it",
+                                 worker_id, worker.failures)
+                else:
+                    delay = min(MAX_RESTART_BACKOFF, self.restart_backoff * 2 ** (worker.failures - 1))
+                    worker.restart_at = now + delay
+                    logger.warning("Restarting inference worker %d in %.1fs", worker_id, delay)
+
+    def status(self) -> dict:
+        with self._lock:
+            workers = [
+                {
+                    "id": w.id,
+                    "pid": w.process.pid,
+                    "alive": w.process.is_alive(),
+                    "ready": w.ready,
+                    "inflight": len(w.inflight),
+                    "completed": w.completed,
+                    "restarts": w.restarts,
+                    "failures": w.failures,
+                    "gave_up": w.gave_up,
+                }
+                for w in self._workers
+            ]
+        ready = sum(1 for w in workers if w["ready"] and w["alive"])
+        return {
+            "ready": ready > 0,
+            "workers_ready": ready,
+            "workers": workers,
+        }
+
+
+worker_pool = InferenceWorkerPool()
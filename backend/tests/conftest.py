@@ -0,0 +1,106 @@
+# tests/conftest.py
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import text
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from models import db, Incident, SOSReport, Donation, User  # noqa: E402
+from services.geo import coordinates_for  # noqa: E402
+
+# Rows seeded per table; raise it locally (QUERY_PLAN_ROWS=500000) to check scaling
+SEED_ROWS = int(os.getenv("QUERY_PLAN_ROWS", "50000"))
+SEED_USERS = max(100, SEED_ROWS // 10)
+STATUSES = ["Pending", "In Progress", "Resolved"]
+WORDS = ["fire", "crash", "flood", "collapse", "injury", "gas", "leak", "truck", "bus", "bridge", "market", "school"]
+# Reports are spread around Delhi, so proximity queries hit a realistic density
+CENTER = (28.6139, 77.2090)
+
+
+def seed(rows):
+    """
+    Fill the tables with a year of synthetic history ending now, so recent
+    windows (?since=, date ranges) select a small slice of a large table.
+    """
+    rng = random.Random(1234)
+    start = datetime.utcnow() - timedelta(days=365)
+
+    def report(i):
+        reported_at = start + timedelta(seconds=rng.randrange(0, 365 * 24 * 3600))
+        location = f"{CENTER[0] + rng.uniform(-0.5, 0.5):.5f},{CENTER[1] + rng.uniform(-0.5, 0.5):.5f}"
+        return {
+            "title": f"{rng.choice(WORDS).title()} near {rng.choice(WORDS)} #{i}",
+            "location": location,
+            "status": rng.choice(STATUSES),
+            "reported_at": reported_at,
+            "updated_at": min(reported_at + timedelta(minutes=rng.randrange(0, 600)), start + timedelta(days=365)),
+            **coordinates_for(location),
+        }
+
+    incidents = []
+    for i in range(rows):
+        row = report(i)
+        row["description"] = " ".join(rng.choice(WORDS) for _ in range(8))
+        incidents.append(row)
+    db.session.execute(Incident.__table__.insert(), incidents)
+
+    sos = []
+    for i in range(rows):
+        row = report(i)
+        row["severity"] = rng.choice(["low", "medium", "high"])
+        sos.append(row)
+    db.session.execute(SOSReport.__table__.insert(), sos)
+
+    db.session.execute(Donation.__table__.insert(), [
+        {
+            "donor_name": f"Donor {i}",
+            "amount": round(rng.uniform(1, 500), 2),
+            "donated_at": start + timedelta(seconds=rng.randrange(0, 365 * 24 * 3600)),
+        }
+        for i in range(rows)
+    ])
+
+    admin = User(name="Admin", email="admin@example.com", role="admin")
+    admin.set_password("secret")
+    db.session.add(admin)
+    db.session.execute(User.__table__.insert(), [
+        {"name": f"User {i}", "email": f"user{i}@example.com", "password_hash": "x", "role": "volunteer"}
+        for i in range(SEED_USERS)
+    ])
+    db.session.commit()
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    path = tmp_path_factory.mktemp("db") / "query_plans.db"
+
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        # Only the CRUD blueprints: no models are loaded
+        ENABLED_BLUEPRINTS = ["auth", "incidents", "users", "sos", "donations"]
+        MODEL_LOADING = "lazy"
+        MEDIA_STORAGE = "local"
+        MEDIA_LOCAL_DIR = str(tmp_path_factory.mktemp("media"))
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        # Build the schema with the migrations, so the indexes asserted below are the ones they create
+        upgrade(directory=os.path.join(BACKEND_DIR, "migrations"))
+        seed(SEED_ROWS)
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,186 @@
+# tests/test_query_plans.py
+"""
+Query-plan regression suite. Every endpoint below is called against large
+seeded tables (see conftest.py) while the SQL it runs is captured; each
+SELECT is then run through EXPLAIN QUERY PLAN and must not scan a whole
+table or sort one in a temporary B-tree, and must use the index the
+migrations created for it.
+
+Every endpoint's median response time must also stay within a generous
+budget, which catches gross regressions on any machine. CI additionally
+compares against the committed baseline (measured with the default row
+count), see .github/workflows/backend-tests.yml:
+
+    pip install pytest && python -m pytest tests -q
+    QUERY_TIMINGS_BASELINE=tests/query_timings_baseline.json QUERY_TIMINGS_TOLERANCE=3 python -m pytest tests -q
+
+    QUERY_PLAN_ROWS          rows seeded per table (default 50000)
+    QUERY_PLAN_BUDGET_MS     fail if an endpoint's median response time exceeds this (default 500)
+    QUERY_TIMINGS_PATH       write the measured timings to this JSON file (to refresh the baseline)
+    QUERY_TIMINGS_BASELINE   fail if an endpoint got QUERY_TIMINGS_TOLERANCE
+                             (default 1.5) times slower than in this file
+"""
+import json
+import os
+import re
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models import db
+
+BUDGET_MS = float(os.getenv("QUERY_PLAN_BUDGET_MS", "500"))
+TIMINGS_PATH = os.getenv("QUERY_TIMINGS_PATH")
+BASELINE_PATH = os.getenv("QUERY_TIMINGS_BASELINE")
+TOLERANCE = float(os.getenv("QUERY_TIMINGS_TOLERANCE", "1.5"))
+REPEAT = 5
+TABLES = ("incidents", "sos_reports", "donations", "users", "tombstones")
+DELHI = "lat=28.6139&lng=77.2090"
+# The seeded history ends now: a day of changes and a week of reports
+SINCE = (datetime.utcnow() - timedelta(days=1)).isoformat(timespec="seconds")
+WEEK_FROM = (datetime.utcnow() - timedelta(days=37)).date().isoformat()
+WEEK_TO = (datetime.utcnow() - timedelta(days=31)).date().isoformat()
+
+timings = {}
+
+
+@contextmanager
+def captured_sql(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def query_plan(statement, parameters):
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def plan_problems(statement, plan, allow_sort=False):
+    """Full scans of a seeded table and sorts of its rows, if any"""
+    problems = []
+    ordered_limit = re.search(r"\bORDER BY\b", statement) and re.search(r"\bLIMIT\b", statement)
+    for line in plan:
+        for table in TABLES:
+            # "SCAN t USING INDEX ..." walks an index in order; a bare "SCAN t"
+            # reads the table, which is only fine in rowid order under a LIMIT
+            if re.fullmatch(rf"SCAN {table}( AS \w+)?", line) and not ordered_limit:
+                problems.append(line)
+        if "USE TEMP B-TREE" in line and not allow_sort:
+            problems.append(line)
+    return problems
+
+
+def record_timing(name, client, method, url, **kwargs):
+    samples = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code < 400, response.get_data(as_text=True)
+    timings[name] = round(statistics.median(samples), 2)
+    return timings[name]
+
+
+def check_endpoint(app, client, name, url, expect_index=None, method="GET", allow_sort=False, **kwargs):
+    with app.app_context():
+        with captured_sql(db.engine) as statements:
+            response = client.open(url, method=method, **kwargs)
+        assert response.status_code < 400, response.get_data(as_text=True)
+        assert statements, f"{name}: no queries captured"
+
+        plans = [(statement, query_plan(statement, parameters)) for statement, parameters in statements]
+    for statement, plan in plans:
+        problems = plan_problems(statement, plan, allow_sort)
+        assert not problems, f"{name}: {problems}\n{statement}\n{plan}"
+    if expect_index:
+        used = " ".join(line for _, plan in plans for line in plan)
+        assert expect_index in used, f"{name}: {expect_index} not used\n{plans}"
+
+    elapsed = record_timing(name, client, method, url, **kwargs)
+    assert elapsed <= BUDGET_MS, f"{name}: median {elapsed} ms exceeds {BUDGET_MS} ms"
+    return response
+
+
+@pytest.mark.parametrize("name, url, expect_index", [
+    ("incidents.list", "/api/incidents", "ix_incidents_reported_at_id"),
+    ("incidents.status", "/api/incidents?status=Pending", "ix_incidents_status_reported_at_id"),
+    ("incidents.date_range", f"/api/incidents?from={WEEK_FROM}&to={WEEK_TO}", "ix_incidents_reported_at_id"),
+    ("incidents.since", f"/api/incidents?since={SINCE}", "ix_incidents_updated_at"),
+    ("incidents.nearby", f"/api/incidents/nearby?{DELHI}&radius_km=2", "ix_incidents_geohash"),
+    ("sos.list", "/api/sos/", "ix_sos_reports_reported_at_id"),
+    ("sos.status", "/api/sos/?status=Pending", "ix_sos_reports_status_reported_at_id"),
+    ("sos.since", f"/api/sos/?since={SINCE}", "ix_sos_reports_updated_at"),
+    ("sos.nearby", f"/api/sos/nearby?{DELHI}&radius_km=2", "ix_sos_reports_geohash"),
+    ("sos.nearest", f"/api/sos/nearest?{DELHI}&k=5", "ix_sos_reports_status_geohash"),
+    ("donations.list", "/api/donations", "ix_donations_donated_at_id"),
+    ("users.list", "/api/users", None),
+])
+def test_list_endpoints_use_indexes(app, client, name, url, expect_index):
+    check_endpoint(app, client, name, url, expect_index)
+
+
+@pytest.mark.parametrize("name, url, expect_index", [
+    ("incidents.next_page", "/api/incidents", "ix_incidents_reported_at_id"),
+    ("sos.next_page", "/api/sos/", "ix_sos_reports_reported_at_id"),
+    ("donations.next_page", "/api/donations", "ix_donations_donated_at_id"),
+    ("users.next_page", "/api/users", None),
+])
+def test_later_pages_seek_instead_of_scanning(app, client, name, url, expect_index):
+    first = client.get(url)
+    cursor = first.headers.get("X-Next-Cursor")
+    assert cursor, "the seeded table should span more than one page"
+    check_endpoint(app, client, name, f"{url}?cursor={cursor}", expect_index)
+
+
+@pytest.mark.parametrize("name, url", [
+    ("incidents.search", "/api/incidents?q=bridge+coll"),
+    ("sos.search", "/api/sos/?q=market"),
+])
+def test_text_search_uses_fts(app, client, name, url):
+    # Matches come from the FTS index by rowid; sorting just those is fine
+    check_endpoint(app, client, name, url, "VIRTUAL TABLE", allow_sort=True)
+
+
+def test_login_looks_up_email_by_index(app, client):
+    check_endpoint(
+        app, client, "auth.login", "/api/auth", "sqlite_autoindex_users_1", method="POST",
+        json={"action": "login", "email": "admin@example.com", "password": "secret"},
+    )
+
+
+def test_unchanged_list_is_not_modified(app, client):
+    etag = client.get("/api/incidents").headers["ETag"]
+    check_endpoint(app, client, "incidents.not_modified", "/api/incidents", headers={"If-None-Match": etag})
+    assert client.get("/api/incidents", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_timings_within_baseline():
+    """Runs last: write the timings and compare them with the baseline"""
+    if TIMINGS_PATH:
+        with open(TIMINGS_PATH, "w") as f:
+            json.dump(timings, f, indent=2, sort_keys=True)
+    if not BASELINE_PATH:
+        pytest.skip("QUERY_TIMINGS_BASELINE not set")
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    # A few milliseconds of slack so tiny timings do not fail on noise
+    slower = {
+        name: (baseline[name], elapsed)
+        for name, elapsed in timings.items()
+        if name in baseline and elapsed > baseline[name] * TOLERANCE + 5
+    }
+    assert not slower, f"slower than baseline (baseline ms, now ms): {slower}"
@@ -6,6 +6,7 @@ import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Edit, Trash } from "lucide-react";
 import { Loader2, AlertCircle } from "lucide-react";
+import Pager from "@/components/Pager";
 
 interface SOSReport {
   id: number;
@@ -23,6 +24,10 @@ export default function AdminSOSPage() {
   const [reports, setReports] = useState<SOSReport[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
+  // Keyset paging: cursor of the page shown (null for the first) and of its neighbours
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [prevCursor, setPrevCursor] = useState<string | null>(null);
   
   // Editing state
   const [editingId, setEditingId] = useState<number | null>(null);
@@ -32,12 +37,14 @@ export default function AdminSOSPage() {
     loadReports();
   }, []);
 
-  const loadReports = async () => {
+  const loadReports = async (pageCursor: string | null = cursor) => {
     setLoading(true);
     try {
-      const data = await getSOSReports();
-      if (Array.isArray(data)) setReports(data);
-      else setError("Unexpected response format");
+      const page = await getSOSReports(undefined, pageCursor);
+      setReports(page.items);
+      setCursor(pageCursor);
+      setNextCursor(page.nextCursor);
+      setPrevCursor(page.prevCursor);
     } catch (err: any) {
       setError(err.message || "Error fetching SOS reports");
     } finally {
@@ -209,6 +216,7 @@ export default function AdminSOSPage() {
           </tbody>
         </table>
       </div>
+      <Pager prevCursor={prevCursor} nextCursor={nextCursor} onPage={loadReports} />
     </div>
   );
 }
\ No newline at end of file
@@ -3,6 +3,7 @@ import { getIncidents, updateIncident, deleteIncident } from "@/api";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Edit, Trash } from "lucide-react";
+import Pager from "@/components/Pager";
 
 interface Incident {
   id: number;
@@ -18,6 +19,10 @@ export default function IncidentPage() {
   const [incidents, setIncidents] = useState<Incident[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string>("");
+  // Keyset paging: cursor of the page shown (null for the first) and of its neighbours
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [prevCursor, setPrevCursor] = useState<string | null>(null);
 
   // Editing state
   const [editingIncidentId, setEditingIncidentId] = useState<number | null>(null);
@@ -27,13 +32,16 @@ export default function IncidentPage() {
   const [editContact, setEditContact] = useState<string>("");
   const [editStatus, setEditStatus] = useState<string>("");
 
-  const loadIncidents = async () => {
+  const loadIncidents = async (pageCursor: string | null = cursor) => {
     setLoading(true);
     try {
       const token = localStorage.getItem("authToken");
       if (!token) throw new Error("Authentication token not found");
-      const data = await getIncidents(token);
-      setIncidents(data);
+      const page = await getIncidents(token, pageCursor);
+      setIncidents(page.items);
+      setCursor(pageCursor);
+      setNextCursor(page.nextCursor);
+      setPrevCursor(page.prevCursor);
     } catch (err: any) {
       setError(err.message || "Error fetching incidents");
     } finally {
@@ -211,6 +219,7 @@ export default function IncidentPage() {
             </tbody>      
             </table>     
             </div>   
+            <Pager prevCursor={prevCursor} nextCursor={nextCursor} onPage={loadIncidents} />
             </div> 
             );
 }
\ No newline at end of file
@@ -3,6 +3,7 @@ import { getUsers, updateUser, deleteUser, createUser } from "@/api";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Edit, Trash } from "lucide-react";
+import Pager from "@/components/Pager";
 
 interface User {
   id: number;
@@ -15,6 +16,10 @@ export default function AdminUsers() {
   const [users, setUsers] = useState<User[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string>("");
+  // Keyset paging: cursor of the page shown (null for the first) and of its neighbours
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [prevCursor, setPrevCursor] = useState<string | null>(null);
 
   // Editing state for an existing user
   const [editingUserId, setEditingUserId] = useState<number | null>(null);
@@ -30,13 +35,16 @@ export default function AdminUsers() {
   const [newPassword, setNewPassword] = useState<string>("");
   const [confirmPassword, setConfirmPassword] = useState<string>("");
 
-  const loadUsers = async () => {
+  const loadUsers = async (pageCursor: string | null = cursor) => {
     setLoading(true);
     try {
       const token = localStorage.getItem("authToken");
       if (!token) throw new Error("Authentication token not found");
-      const data = await getUsers(token);
-      setUsers(data);
+      const page = await getUsers(token, pageCursor);
+      setUsers(page.items);
+      setCursor(pageCursor);
+      setNextCursor(page.nextCursor);
+      setPrevCursor(page.prevCursor);
     } catch (err: any) {
       setError(err.message || "Error fetching users");
     } finally {
@@ -313,6 +321,7 @@ export default function AdminUsers() {
           </tbody>
         </table>
       </div>
+      <Pager prevCursor={prevCursor} nextCursor={nextCursor} onPage={loadUsers} />
     </div>
   );
 }
@@ -1,5 +1,29 @@
 export const API_BASE_URL = "http://127.0.0.1:5000";
 
+// List endpoints return one keyset page at a time; X-Next-Cursor / X-Prev-Cursor point to the neighbouring pages
+export const PAGE_SIZE = 50;
+
+export interface Page<T = any> {
+  items: T[];
+  nextCursor: string | null;
+  prevCursor: string | null;
+}
+
+async function fetchPage(path: string, cursor?: string | null, init?: RequestInit): Promise<Page> {
+  const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+  if (cursor) params.set("cursor", cursor);
+  const response = await fetch(`${API_BASE_URL}${path}?${params}`, init);
+  const body = await response.json();
+  if (!response.ok || !Array.isArray(body)) {
+    throw new Error(body?.error || `Request failed with status ${response.status}`);
+  }
+  return {
+    items: body,
+    nextCursor: response.headers.get("X-Next-Cursor"),
+    prevCursor: response.headers.get("X-Prev-Cursor"),
+  };
+}
+
 // 🟢 Auth API
 export async function registerUser(data: {
   name: string;
@@ -42,11 +66,10 @@ export async function createIncident(data: {
   return response.json();
 }
 
-export async function getIncidents(token?: string) {
+export async function getIncidents(token?: string, cursor?: string | null) {
   // Optionally add authentication if token is provided
   const headers = token ? { Authorization: `Bearer ${token}` } : {};
-  const response = await fetch(`${API_BASE_URL}/api/incidents`, { headers });
-  return response.json();
+  return fetchPage("/api/incidents", cursor, { headers });
 }
 
 export const updateIncident = async (
@@ -87,9 +110,9 @@ export async function resolveSOS(id: number) {
 }
 
 // 🟡 Users API (formerly volunteer API)
-export async function getUsers() {
-  const response = await fetch(`${API_BASE_URL}/api/users`);
-  return response.json();
+export async function getUsers(token?: string, cursor?: string | null) {
+  const headers = token ? { Authorization: `Bearer ${token}` } : {};
+  return fetchPage("/api/users", cursor, { headers });
 }
 
 export async function updateUser(id: number, data: { name: string; email: string; role?: string }) {
@@ -137,12 +160,11 @@ export async function analyzeImage(imageData: string) {
 }
 
 // 🟣 SOS API
-export async function getSOSReports(token?: string) {
+export async function getSOSReports(token?: string, cursor?: string | null) {
   const headers: HeadersInit = { "Content-Type": "application/json" };
   if (token) headers["Authorization"] = `Bearer ${token}`;
   
-  const response = await fetch(`${API_BASE_URL}/api/sos/`, { headers });
-  return response.json();
+  return fetchPage("/api/sos/", cursor, { headers });
 }
 
 export async function sendSOS(data: any, token: string) {
@@ -0,0 +1,22 @@
+import { Button } from "@/components/ui/button";
+
+interface PagerProps {
+  prevCursor: string | null;
+  nextCursor: string | null;
+  onPage: (cursor: string) => void;
+}
+
+// Previous / Next buttons for a keyset-paginated list
+export default function Pager({ prevCursor, nextCursor, onPage }: PagerProps) {
+  if (!prevCursor && !nextCursor) return null;
+  return (
+    <div className="flex justify-end gap-3">
+      <Button variant="outline" disabled={!prevCursor} onClick={() => prevCursor && onPage(prevCursor)}>
+        Previous
+      </Button>
+      <Button variant="outline" disabled={!nextCursor} onClick={() => nextCursor && onPage(nextCursor)}>
+        Next
+      </Button>
+    </div>
+  );
+}